@@ -18,6 +18,7 @@
 
 import sys
 import code
+import weakref
 import psi
 from psi.settings import Configuration
 from psi.entity import Entity, EntityContainer
@@ -51,27 +52,40 @@ class PSIInterpreter(code.InteractiveConsole):
             self.showtraceback()
 
 
+_instance = None     # the running application
+
+
 class App(object):
 
-    _app = None
+    @classmethod
+    def instance(cls):
+        """Return the running application, one is created if necessary"""
+        if _instance is None:
+            cls()
 
-    def __new__(cls, *args, **kwargs):
-        if cls._app is not None:  # singleton
-            return cls._app
-        else:
-            inst = super(App, cls).__new__(cls, *args, **kwargs)
-            cls._app = inst
-            return inst
+        return _instance
 
     def __init__(self):
-        """Initialize all managers and subsystems"""
-        Units._app = self
+        """Initialize all managers and subsystems.
+
+        The last application created is the running application, see
+        instance.
+        """
+        global _instance
+        _instance = self
+
+        # objects refer back to the running app through a proxy so that the
+        # app only holds strong references to its containers and not the
+        # other way, the module keeps the app alive
+        app = weakref.proxy(self)
+
+        Units._app = app
         self.units = Units()
 
         # pass app to class objects/containers
-        Configuration._app = self
-        Entity._app = self
-        EntityContainer._app = self
+        Configuration._app = app
+        Entity._app = app
+        EntityContainer._app = app
 
         self.models = ModelContainer()
         self.points = PointManager()
@@ -86,8 +100,16 @@ class App(object):
         self.codes = CodeContainer()
         self.reports = ReportContainer()
 
-        self.interp = PSIInterpreter()
-        self.interp.locals = self._interp_locals
+        # created on first use, not needed when psi is used as a library
+        self._interp = None
+
+    @property
+    def interp(self):
+        """The PSI interpreter"""
+        if self._interp is None:
+            self._interp = PSIInterpreter(self._interp_locals)
+
+        return self._interp
 
     @property
     def _interp_locals(self):
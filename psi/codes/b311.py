@@ -16,10 +16,11 @@
 
 """Implementation of B31.1 Power Piping codes"""
 
-import math
 import sys
 from contextlib import redirect_stdout
 
+import numpy as np
+
 from psi.elements import (Run, Bend, Reducer, Rigid, Valve, Flange)
 from psi.sifs import (Welding, Unreinforced, Reinforced, Weldolet, Sockolet,
                       Sweepolet, Weldolet, ButtWeld)
@@ -385,7 +386,7 @@ class B31167(Code):
         """Longitudinal stress due to bending moments."""
         with units.Units(user_units="code_english"):
             my, mz = forces[-2:]
-            M = math.sqrt(my**2 + mz**2)
+            M = np.sqrt(my**2 + mz**2)
 
             # note for B31.1 sifi equals sifo
             i = self.sifi(element, point)
@@ -399,7 +400,7 @@ class B31167(Code):
         """Transverse shear stress"""
         with units.Units(user_units="code_english"):
             fy, fz = forces[1:3]
-            F = math.sqrt(fy**2 + fz**2)
+            F = np.sqrt(fy**2 + fz**2)
 
             section = element.section
             area = section.area
@@ -448,17 +449,89 @@ class B31167(Code):
             stor = self.stor(element, forces)
 
             if loadcase.stype == "sus" or loadcase.stype == "occ":
-                return sax + slp + math.sqrt(slb**2 + 4*stor**2)
+                return sax + slp + np.sqrt(slb**2 + 4*stor**2)
             elif loadcase.stype == "exp":
-                return math.sqrt(slb**2 + 4*stor**2)
+                return np.sqrt(slb**2 + 4*stor**2)
             else:
                 return 0
 
-    def sallow(self, element, loadcase, point, forces):
-        """Allowable stress for sustained, occasional and expansion loadcases.
+    def slb_batch(self, elements, points, forces):
+        """Longitudinal stress due to bending moments of each element.
 
-        Liberal stress can be excluded for the expansion case by user defined
-        option otherwise enabled by default depending on the code.
+        Equal to M*i/Z where M is the resultant of the in-plane and
+        out-of-plane moments.
+        """
+        with units.Units(user_units="code_english"):
+            my, mz = forces[:, 4], forces[:, 5]
+            M = np.sqrt(my**2 + mz**2)
+
+            i = self.sifi_batch(elements, points)
+            Z = self._section_values(elements, "z")
+
+            return M*i / Z
+
+    def sts_batch(self, elements, forces):
+        """Transverse shear stress of each element.
+
+        Equal to F/A where F is the resultant of the shear forces.
+        """
+        with units.Units(user_units="code_english"):
+            fy, fz = forces[:, 1], forces[:, 2]
+            F = np.sqrt(fy**2 + fz**2)
+
+            return F / self._section_values(elements, "area")
+
+    def stor_batch(self, elements, forces):
+        """Shear stress due to torsion of each element.
+
+        Equal to Mx*Do/(2*Ip).
+        """
+        with units.Units(user_units="code_english"):
+            mx = forces[:, 3]
+            do = self._section_values(elements, "od")
+            Ip = self._section_values(elements, "ixx")
+
+            return mx*do / (2*Ip)
+
+    def sax_batch(self, elements, forces):
+        """Axial stress due to mechanical loading of each element.
+
+        Equal to Fx/A when the axial force option is set, zero otherwise.
+        """
+        sx = np.zeros(len(elements), dtype=np.float64)
+
+        if self.app.models.active_object.settings.axial_force:
+            with units.Units(user_units="code_english"):
+                sx = forces[:, 0] / self._section_values(elements, "area")
+
+        return sx
+
+    def sl_batch(self, elements, loadcase, points, forces):
+        """Total longitudinal stress of each element, i.e. the code stress.
+
+        Equal to Sax + Slp + sqrt(Slb**2 + 4*Stor**2) for sustained and
+        occasional loadcases and sqrt(Slb**2 + 4*Stor**2) for expansion
+        loadcases.
+        """
+        with units.Units(user_units="code_english"):
+            if loadcase.stype == "sus" or loadcase.stype == "occ":
+                slp = self.slp_batch(elements, loadcase)
+                slb = self.slb_batch(elements, points, forces)
+                sax = self.sax_batch(elements, forces)
+                stor = self.stor_batch(elements, forces)
+
+                return sax + slp + np.sqrt(slb**2 + 4*stor**2)
+            elif loadcase.stype == "exp":
+                slb = self.slb_batch(elements, points, forces)
+                stor = self.stor_batch(elements, forces)
+
+                return np.sqrt(slb**2 + 4*stor**2)
+            else:
+                return np.zeros(len(elements), dtype=np.float64)
+
+    def shsc(self, element, loadcase):
+        """The hot and cold allowable stress of the element material at the
+        operating temperature of the loadcase.
         """
         with units.Units(user_units="code_english"):
             material = element.material
@@ -471,17 +544,35 @@ class B31167(Code):
                 temp = 70   # fahrenheit
                 tref = 70
 
-            sh = material.sh[temp]
-            sc = material.sh[tref]
+            return material.sh[temp], material.sh[tref]
+
+    def sallow(self, element, loadcase, point, forces, stype=None):
+        """Allowable stress for sustained, occasional and expansion loadcases.
 
-            if loadcase.stype == "sus":
+        Liberal stress can be excluded for the expansion case by user defined
+        option otherwise enabled by default depending on the code.
+
+        The stress type of the loadcase is used unless stype is given.
+        """
+        if stype is None:
+            stype = loadcase.stype
+
+        with units.Units(user_units="code_english"):
+            # loadcases and loadcombs with the same operating cases share the
+            # same hot and cold allowables
+            opercases = tuple(zip(loadcase.loadtypes, loadcase.opercases))
+            sh, sc = self._memoize(("shsc", opercases),
+                                   lambda element: self.shsc(element, loadcase),
+                                   element)
+
+            if stype == "sus":
                 return sh
-            elif loadcase.stype == "occ":
+            elif stype == "occ":
                 # k factor is 1.15 for events lasting 8hrs or less and 1.20
                 # for 1hr or less per code para. 102.3.3, use 1.15 to be
                 # conservative
                 return self.k * sh
-            elif loadcase.stype == "exp":
+            elif stype == "exp":
                 liberal_stress = 0  # default per code
                 if self.app.models.active_object.settings.liberal_stress:
                     cases = self.app.models.active_object.loadcases
@@ -16,7 +16,9 @@
 
 """Implementation of different piping codes"""
 
-import math
+from contextlib import contextmanager
+
+import numpy as np
 
 from psi.entity import (Entity, EntityContainer, ActiveEntityMixin,
                         ActiveEntityContainerMixin)
@@ -29,6 +31,8 @@ from psi import units
 
 class Code(Entity, ActiveEntityMixin):
 
+    _cache = None   # memoized element values, see cached
+
     def __init__(self, name):
         super(Code, self).__init__(name)
 
@@ -44,6 +48,32 @@ class Code(Entity, ActiveEntityMixin):
     def apply(self, elements=None):
         self.parent.apply(self, elements)
 
+    @contextmanager
+    def cached(self):
+        """Memoize the sifs, section properties and pressure stresses of the
+        elements for the duration of the context. The model must not be
+        changed inside the context, the values are discarded on exit.
+        """
+        self._cache = {}
+        try:
+            yield self
+        finally:
+            # the class default applies again, the memo is never saved
+            del self._cache
+
+    def _memoize(self, key, func, element, *args):
+        """Call func for the element or return the memoized value"""
+        cache = self._cache
+        if cache is None:
+            return func(element, *args)
+
+        key = (key, element) + args
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = func(element, *args)
+            return value
+
     def sifi(self, element):
         """Element stress intensification factor.
 
@@ -112,11 +142,11 @@ class Code(Entity, ActiveEntityMixin):
 
     def s1(self, sl, shoop, stor, sts):
         """Maximum principal stress"""
-        return (sl+shoop)*0.5 + math.sqrt(((sl-shoop)*0.5)**2 + (stor+sts)**2)
+        return (sl+shoop)*0.5 + np.sqrt(((sl-shoop)*0.5)**2 + (stor+sts)**2)
 
     def s2(self, sl, shoop, stor, sts):
         """Minimum principal stress"""
-        return (sl+shoop)*0.5 - math.sqrt(((sl-shoop)*0.5)**2 + (stor+sts)**2)
+        return (sl+shoop)*0.5 - np.sqrt(((sl-shoop)*0.5)**2 + (stor+sts)**2)
 
     def max_shear(self, s1, s2):
         """Maximum shear stress"""
@@ -128,12 +158,95 @@ class Code(Entity, ActiveEntityMixin):
 
     def svon(self, s1, s2):
         """Von mises stress"""
-        return math.sqrt(0.5*((s1-s2)**2 + s2**2 + (-s1)**2))
+        return np.sqrt(0.5*((s1-s2)**2 + s2**2 + (-s1)**2))
 
-    def sallow(self, element, loadcase):
-        """Element stress allowable based on the stress type of loadcase."""
+    def sallow(self, element, loadcase, point, forces, stype=None):
+        """Element stress allowable based on the stress type of loadcase.
+
+        The stress type of the loadcase is used unless stype is given.
+        """
         raise NotImplementedError("implement")
 
+    def _section_values(self, elements, attr):
+        """Array of a section property of each element"""
+        def value(element):
+            return getattr(element.section, attr)
+
+        return np.array([self._memoize(attr, value, element) for element in
+                         elements], dtype=np.float64)
+
+    # The batch methods return one value per element for a group of elements
+    # that use the code. Each row of forces and each point corresponds to an
+    # element. By default the scalar methods are called for each element,
+    # derived codes can override them with array operations.
+
+    def sifi_batch(self, elements, points):
+        """In plane sif of each element at the given points"""
+        return np.array([self._memoize("sifi", self.sifi, element, point)
+                         for element, point in zip(elements, points)],
+                        dtype=np.float64)
+
+    def sifo_batch(self, elements, points):
+        """Out of plane sif of each element at the given points"""
+        return np.array([self._memoize("sifo", self.sifo, element, point)
+                         for element, point in zip(elements, points)],
+                        dtype=np.float64)
+
+    def _pressure_values(self, elements, loadcase, name):
+        """Array of a pressure stress of each element.
+
+        The pressure stresses only depend on the operating cases of the
+        loadcase so they are shared by the loadcases with the same ones.
+        """
+        opercases = tuple(zip(loadcase.loadtypes, loadcase.opercases))
+        func = getattr(self, name)
+
+        return np.array([self._memoize((name, opercases),
+                                       lambda element: func(element, loadcase),
+                                       element) for element in elements],
+                        dtype=np.float64)
+
+    def shoop_batch(self, elements, loadcase):
+        """Hoop stress of each element"""
+        return self._pressure_values(elements, loadcase, "shoop")
+
+    def slp_batch(self, elements, loadcase):
+        """Longitudinal pressure stress of each element"""
+        return self._pressure_values(elements, loadcase, "slp")
+
+    def slb_batch(self, elements, points, forces):
+        """Bending stress of each element"""
+        return np.array([self.slb(element, point, force) for element, point,
+                         force in zip(elements, points, forces)],
+                        dtype=np.float64)
+
+    def sts_batch(self, elements, forces):
+        """Transverse shear stress of each element"""
+        return np.array([self.sts(element, force) for element, force in
+                         zip(elements, forces)], dtype=np.float64)
+
+    def stor_batch(self, elements, forces):
+        """Torsional stress of each element"""
+        return np.array([self.stor(element, force) for element, force in
+                         zip(elements, forces)], dtype=np.float64)
+
+    def sax_batch(self, elements, forces):
+        """Axial stress of each element"""
+        return np.array([self.sax(element, force) for element, force in
+                         zip(elements, forces)], dtype=np.float64)
+
+    def sl_batch(self, elements, loadcase, points, forces):
+        """Code stress of each element"""
+        return np.array([self.sl(element, loadcase, point, force) for
+                         element, point, force in
+                         zip(elements, points, forces)], dtype=np.float64)
+
+    def sallow_batch(self, elements, loadcase, points, forces, stype=None):
+        """Allowable stress of each element"""
+        return np.array([self.sallow(element, loadcase, point, force, stype)
+                         for element, point, force in
+                         zip(elements, points, forces)], dtype=np.float64)
+
     def toper(self, element, loadcase):
         """Convenience function to get the largest element temperature load for
         a particular operating case.
@@ -221,7 +334,7 @@ class Code(Entity, ActiveEntityMixin):
                 return None
 
 
-class CodeContainer(EntityContainer, ActiveEntityContainerMixin):
+class CodeContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(CodeContainer, self).__init__()
@@ -244,10 +357,7 @@ class CodeContainer(EntityContainer, ActiveEntityContainerMixin):
             elements.
         """
         if elements is None:
-            elements = []
-
-            for element in self.app.elements.active_objects:
-                elements.append(element)
+            elements = list(self.app.elements.active_objects)
 
         for element in elements:
             element.code = code
@@ -113,6 +113,60 @@ from psi.sections import Pipe
 # TODO: Check app.points to determine if point exists, __new__
 
 
+def beam_klocal(L, E, G, J, Iy, Iz, A, phi_y=0, phi_z=0, kfac=1):
+    """The local stiffness matrix of a straight beam element.
+
+    The properties can be scalars or arrays with one value per element, in
+    which case a stack of matrices with shape (n, 12, 12) is returned.
+
+    Stiffness matrix from 'Theory of Matrix Structural Analysis' by J.S.
+    Przemieniecki.
+    """
+    L, E, G, J, Iy, Iz, A, phi_y, phi_z, kfac = np.broadcast_arrays(
+        *map(np.asarray, (L, E, G, J, Iy, Iz, A, phi_y, phi_z, kfac)))
+    kmat = np.zeros(L.shape + (12, 12), dtype=np.float64)
+
+    kmat[..., 0, 0] = (E*A) / L
+    kmat[..., 0, 6] = kmat[..., 6, 0] = (-E*A) / L
+
+    kmat[..., 1, 1] = (12*E*Iz / (L**3*(1+phi_y))) / kfac
+    kmat[..., 1, 5] = kmat[..., 5, 1] = (6*E*Iz / (L**2*(1+phi_y))) / kfac
+    kmat[..., 1, 7] = kmat[..., 7, 1] = (-12*E*Iz / (L**3*(1+phi_y))) / kfac
+    kmat[..., 1, 11] = kmat[..., 11, 1] = (6*E*Iz / (L**2*(1+phi_y))) / kfac
+
+    kmat[..., 2, 2] = (12*E*Iy / (L**3*(1+phi_z))) / kfac
+    kmat[..., 2, 4] = kmat[..., 4, 2] = (-6*E*Iy / (L**2*(1+phi_z))) / kfac
+    kmat[..., 2, 8] = kmat[..., 8, 2] = (-12*E*Iy / (L**3*(1+phi_z))) / kfac
+    kmat[..., 2, 10] = kmat[..., 10, 2] = (-6*E*Iy / (L**2*(1+phi_z))) / kfac
+
+    kmat[..., 3, 3] = (G*J) / L
+    kmat[..., 9, 3] = kmat[..., 3, 9] = (-G*J) / L
+
+    kmat[..., 4, 4] = ((4+phi_z)*E*Iy / (L*(1+phi_z))) / kfac
+    kmat[..., 4, 8] = kmat[..., 8, 4] = (6*E*Iy / (L**2*(1+phi_z))) / kfac
+    kmat[..., 4, 10] = kmat[..., 10, 4] = ((2-phi_z)*E*Iy / (L*(1+phi_z))) / kfac
+
+    kmat[..., 5, 5] = ((4+phi_y)*E*Iz / (L*(1+phi_y))) / kfac
+    kmat[..., 5, 7] = kmat[..., 7, 5] = (-6*E*Iz / (L**2*(1+phi_y))) / kfac
+    kmat[..., 5, 11] = kmat[..., 11, 5] = ((2-phi_y)*E*Iz / (L*(1+phi_y))) / kfac
+
+    kmat[..., 6, 6] = (E*A) / L
+
+    kmat[..., 7, 7] = (12*E*Iz / (L**3*(1+phi_y))) / kfac
+    kmat[..., 7, 11] = kmat[..., 11, 7] = (-6*E*Iz / (L**2*(1+phi_y))) / kfac
+
+    kmat[..., 8, 8] = (12*E*Iy / (L**3*(1+phi_z))) / kfac
+    kmat[..., 8, 10] = kmat[..., 10, 8] = (6*E*Iy / (L**2*(1+phi_z))) / kfac
+
+    kmat[..., 9, 9] = (G*J) / L
+
+    kmat[..., 10, 10] = ((4+phi_z)*E*Iy / (L*(1+phi_z))) / kfac
+
+    kmat[..., 11, 11] = ((4+phi_y)*E*Iz / (L*(1+phi_y))) / kfac
+
+    return kmat
+
+
 class Element(Entity):
     """Create an element in the active model."""
 
@@ -611,12 +665,13 @@ class Run(Piping):
         bending directions. The stiffness is divided by the flexibility factor,
         effectively making the element more flexible in the transverse bending
         directions. The torsional stiffness is not altered.
-
-        Stiffness matrix from 'Theory of Matrix Structural Analysis' by J.S.
-        Przemieniecki.
         """
-        kmat = np.zeros((12, 12), dtype=np.float64)
+        return beam_klocal(*self.kprops(temp, sfac))
 
+    def kprops(self, temp, sfac=1.0):
+        """The properties passed to beam_klocal to build the local stiffness
+        matrix of the element at the given temperature.
+        """
         L = self.length
         E = self.material.ymod[temp]
         nu = self.material.nu.value     # poisson's ratio
@@ -645,48 +700,7 @@ class Run(Piping):
         # flex factor
         kfac = self.code.kfac(self)
 
-        kmat[0, 0] = (E*A) / L
-        kmat[0, 6] = kmat[6, 0] = (-E*A) / L
-
-        kmat[1, 1] = (12*E*Iz / (L**3*(1+phi_y))) / kfac
-        kmat[1, 5] = kmat[5, 1] = (6*E*Iz / (L**2*(1+phi_y))) / kfac
-        kmat[1, 7] = kmat[7, 1] = (-12*E*Iz / (L**3*(1+phi_y))) / kfac
-        kmat[1, 11] = kmat[11, 1] = (6*E*Iz / (L**2*(1+phi_y))) / kfac
-
-        kmat[2, 2] = (12*E*Iy / (L**3*(1+phi_z))) / kfac
-        kmat[2, 4] = kmat[4, 2] = (-6*E*Iy / (L**2*(1+phi_z))) / kfac
-        kmat[2, 8] = kmat[8, 2] = (-12*E*Iy / (L**3*(1+phi_z))) / kfac
-        kmat[2, 10] = kmat[10, 2] = (-6*E*Iy / (L**2*(1+phi_z))) / kfac
-
-        kmat[3, 3] = (G*J) / L
-        kmat[9, 3] = kmat[3, 9] = (-G*J) / L
-
-        kmat[4, 4] = ((4+phi_z)*E*Iy / (L*(1+phi_z))) / kfac
-        kmat[4, 8] = kmat[8, 4] = (6*E*Iy / (L**2*(1+phi_z))) / kfac
-        kmat[4, 10] = kmat[10, 4] = ((2-phi_z)*E*Iy / (L*(1+phi_z))) / kfac
-
-        kmat[5, 5] = ((4+phi_y)*E*Iz / (L*(1+phi_y))) / kfac
-        kmat[5, 7] = kmat[7, 5] = (-6*E*Iz / (L**2*(1+phi_y))) / kfac
-        kmat[5, 11] = kmat[11, 5] = ((2-phi_y)*E*Iz / (L*(1+phi_y))) / kfac
-
-        kmat[6, 6] = (E*A) / L
-
-        kmat[7, 7] = (12*E*Iz / (L**3*(1+phi_y))) / kfac
-        kmat[7, 11] = kmat[11, 7] = (-6*E*Iz / (L**2*(1+phi_y))) / kfac
-
-        kmat[8, 8] = (12*E*Iy / (L**3*(1+phi_z))) / kfac
-        kmat[8, 10] = kmat[10, 8] = (6*E*Iy / (L**2*(1+phi_z))) / kfac
-
-        kmat[9, 9] = (G*J) / L
-
-        kmat[10, 10] = ((4+phi_z)*E*Iy / (L*(1+phi_z))) / kfac
-
-        kmat[11, 11] = ((4+phi_y)*E*Iz / (L*(1+phi_y))) / kfac
-
-        # with redirect_stdout(sys.__stdout__):
-        #     print(E)
-
-        return kmat
+        return L, E, G, J, Iy, Iz, A, phi_y, phi_z, kfac
 
     def kglobal(self, temp, sfac=1.0):
         """The element global stiffness matrix before assembly into the system
@@ -902,7 +916,7 @@ class Bend(Run):
         # if next element is defined
         model = self.app.models.active_object
         vert = model.geometry.vertices.get(self.to_point, None)
-        if vert and len(vert.edges) == 2:
+        if vert and vert.nedges == 2:
             self.build(self.to_point)
 
     @property
@@ -1136,6 +1150,10 @@ class Rigid(Run):
         """The thickness of rigid elements are multiplied by a factor of 10."""
         return super(Rigid, self).klocal(temp, sfac)
 
+    def kprops(self, temp, sfac=10.0):
+        """The thickness of rigid elements are multiplied by a factor of 10."""
+        return super(Rigid, self).kprops(temp, sfac)
+
     def kglobal(self, temp, sfac=10.0):
         """The thickness of rigid elements are multiplied by a factor of 10."""
         return super(Rigid, self).kglobal(temp, sfac)
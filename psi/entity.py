@@ -22,12 +22,21 @@ its user defined name.
 """
 
 import logging
-from collections import OrderedDict
+from types import MemberDescriptorType
+
+
+def _reconstruct(cls):
+    """Create an unregistered entity instance when unpickling"""
+    return object.__new__(cls)
 
 
 class Entity(object):
     """Base class for psi objects"""
 
+    # the concrete subclasses must keep the instance dict since unit managed
+    # attributes are stored in it, see SIF
+    __slots__ = ("_name", "_type", "_hash")
+
     _app = None
 
     def __new__(cls, name, *args, **kwargs):
@@ -45,6 +54,9 @@ class Entity(object):
             assert model is not None, "create or activate a model"
 
         inst = super(Entity, cls).__new__(cls)
+        inst._name = None   # set by the parent container
+        inst._type = cls.__name__
+        inst._hash = hash(inst._key())
 
         # objects should not be replaced
         if name in inst.parent.objects:
@@ -72,14 +84,47 @@ class Entity(object):
         logger = logging.getLogger("tqdm")
         logger.log(level, message)
 
+    def __reduce_ex__(self, protocol):
+        # __new__ requires a name and registers it with the active model
+        return _reconstruct, (self.__class__,), self.__getstate__()
+
+    def __getstate__(self):
+        # slots are not pickled by default
+        return self.__dict__, {"_name": self._name, "_type": self._type}
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # saved before the slots were added, the name is only known to
+            # the model and is set when the model is opened
+            cls = self.__class__
+            slots = {"_name": None, "_type": cls.__name__}
+            for key in list(state):
+                if isinstance(getattr(cls, key, None), MemberDescriptorType):
+                    slots[key] = state.pop(key)
+        else:
+            state, slots = state
+
+        self.__dict__.update(state)
+        for key, val in slots.items():
+            setattr(self, key, val)
+
+        # string hashes are not the same between sessions
+        self._hash = hash(self._key())
+
     def _key(self):
-        return (self.type, self.name)
+        return (self._type, self._name)
 
     def __eq__(self, other):
-        return self._key() == other._key()
+        if self is other:
+            return True
+
+        if type(self) is not type(other):
+            return NotImplemented
+
+        return self._name == other._name
 
     def __hash__(self):
-        return hash(self._key())
+        return self._hash
 
     @property
     def app(self):
@@ -90,11 +135,11 @@ class Entity(object):
 
     @property
     def type(self):
-        return self.__class__.__name__
+        return self._type
 
     @property
     def name(self):
-        return self.parent.name(self)
+        return self._name
 
     @name.setter
     def name(self, value):
@@ -110,10 +155,14 @@ class Entity(object):
 class EntityContainer(object):
     """Base container object for an entity"""
 
+    __slots__ = ("_objects", "_name_by_id", "_index_by_id")
+
     _app = None
 
     def __init__(self):
-        self._objects = OrderedDict()
+        self._objects = {}
+        self._name_by_id = {}   # reverse lookup, id(inst) -> name
+        self._index_by_id = None    # position lookup, built on demand
 
     @property
     def objects(self):
@@ -124,7 +173,7 @@ class EntityContainer(object):
         return self.__class__._app
 
     def __len__(self):
-        return self.count()
+        return len(self._objects)
 
     def outlog(self, message, level=logging.INFO):
         """Log message to output file"""
@@ -149,34 +198,51 @@ class EntityContainer(object):
 
     def new(self, name, inst):
         self._objects[name] = inst
+        inst._name = name
+        inst._hash = hash(inst._key())
+        self._name_by_id[id(inst)] = name
+        self._index_by_id = None
+
+    def index(self, inst):
+        """Return the position of an object in the container, i.e. the order
+        in which the objects were created.
+        """
+        if self._index_by_id is None:
+            self._index_by_id = {id(val): idx for idx, val in
+                                 enumerate(self._objects.values())}
+
+        return self._index_by_id[id(inst)]
+
+    def _set_objects(self, objects, name_by_id):
+        """Set the objects of the active model and its reverse name lookup"""
+        self._objects = objects
+        self._name_by_id = name_by_id
+        self._index_by_id = None
 
     def name(self, inst, new_name=None):
         """Given an instance return the name or assign a new name if the
         name does not already exist.
         """
-        if new_name:
-            assert new_name not in self._objects.keys(), "name is taken"
+        key = self._name_by_id.get(id(inst), None)
+        if key is None or new_name is None:
+            return key
 
-        for key, val in self._objects.items():
-            if val is inst:
-                if new_name is None:
-                    return key
-                else:
-                    del(self._objects[key])
-                    self.new(new_name, val)
+        assert new_name not in self._objects, "name is taken"
+
+        del self._objects[key]
+        self.new(new_name, inst)
 
     def delete(self, inst):
-        for key, val in self._objects.items():
-            if val is inst:
-                del self._objects[key]
-                return val
+        key = self._name_by_id.pop(id(inst), None)
+        if key is not None:
+            self._index_by_id = None
+            return self._objects.pop(key)
 
     def update(self, inst, **kwargs):
-        for key, val in self._objects.items():
-            if val is inst:
-                for k, v in kwargs.item():
-                    setattr(inst, k, v)
-                return val
+        if id(inst) in self._name_by_id:
+            for k, v in kwargs.items():
+                setattr(inst, k, v)
+            return inst
 
     def __iter__(self):
         for obj in self._objects.values():
@@ -191,18 +257,22 @@ class EntityContainer(object):
 
     def __contains__(self, obj):
         """Return true if the object exists"""
-        return obj in self._objects.values()
+        key = self._name_by_id.get(id(obj), None)
+        return key is not None and self._objects.get(key) is obj
 
     def __getitem__(self, key):
         # return self.__call__(name)
         return list(self._objects.values())[key]
 
     def __repr__(self):
-        return str(self.list())
+        # the objects are not listed, containers can be large
+        return "<%s n=%d>" % (type(self).__name__, len(self._objects))
 
 
 class ActiveEntityMixin(object):
 
+    __slots__ = ()
+
     @property
     def is_active(self):
         return self.parent.is_active(self)
@@ -212,9 +282,17 @@ class ActiveEntityMixin(object):
 
 
 class ActiveEntityContainerMixin(object):
-    """The parent container keeps track of the active object"""
+    """The parent container keeps track of the active object.
+
+    The mixin must come before EntityContainer in the bases of a container
+    so that delete resets the active object.
+    """
+
+    # empty to avoid a layout conflict with EntityContainer
+    __slots__ = ()
 
     def __init__(self):
+        super(ActiveEntityContainerMixin, self).__init__()
         self._active_object = None
 
     def is_active(self, inst):
@@ -238,4 +316,4 @@ class ActiveEntityContainerMixin(object):
         if self._active_object is inst:
             self._active_object = None
 
-        self.delete(inst)
+        return super(ActiveEntityContainerMixin, self).delete(inst)
@@ -64,7 +64,7 @@ class Insulation(Entity, ActiveEntityMixin):
         return "%s(rho=%s, thk=%s)" % ("Insulation", self.rho, self.thk)
 
 
-class InsulationContainer(EntityContainer, ActiveEntityContainerMixin):
+class InsulationContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(InsulationContainer, self).__init__()
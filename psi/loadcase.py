@@ -39,6 +39,7 @@ from collections import namedtuple
 from itertools import zip_longest, product
 from collections import defaultdict
 from contextlib import redirect_stdout
+from enum import IntEnum
 import sys
 
 import numpy as np
@@ -161,8 +162,7 @@ class Movements:
         ndof = 6    # degrees of freedom per node
         if isinstance(item, Point):
             try:
-                model = self._app.models.active_object
-                idxi = list(model.points).index(item)
+                idxi = self._app.points.index(item)
                 niqi, niqj = idxi*ndof, idxi*ndof + ndof
 
                 # note that .results is a column vector
@@ -337,8 +337,7 @@ class Reactions:
         ndof = 6    # degrees of freedom per node
         if isinstance(item, Point):
             try:
-                model = self._app.models.active_object
-                idxi = list(model.points).index(item)
+                idxi = self._app.points.index(item)
                 niqi, niqj = idxi*ndof, idxi*ndof + ndof
 
                 # note that .results is a column vector
@@ -445,15 +444,11 @@ class Forces:
 
     def __getitem__(self, item):
         """Get nodal results."""
-        ndof = 6    # degrees of freedom per node
         if isinstance(item, Point):
             try:
-                model = self._app.models.active_object
-                idxi = list(model.points).index(item)
-                niqi, niqj = idxi*ndof, idxi*ndof + ndof
+                idxi = self._app.points.index(item)
 
-                # note that .results is a column vector
-                return Forces.Result(*self.results[niqi:niqj, 0])
+                return Forces.Result(*self.table[idxi])
             except:
                 raise ValueError("node is not in results array")
 
@@ -461,18 +456,18 @@ class Forces:
             raise ValueError("value not found")
 
     @property
-    def results(self):
-        fx = self._force.results[::3]
-        fy = self._force.results[1::3]
-        fz = self._force.results[2::3]
-        mx = self._moment.results[::3]
-        my = self._moment.results[1::3]
-        mz = self._moment.results[2::3]
+    def table(self):
+        """The nodal forces with one row per point and one column per
+        degree of freedom.
+        """
+        force = self._force.results.reshape(-1, 3)
+        moment = self._moment.results.reshape(-1, 3)
 
-        disp = np.array(list(zip(fx, fy, fz, mx, my, mz)), dtype=np.float64)
-        values = disp.flatten().reshape((-1, 1))
+        return np.hstack([force, moment]).astype(np.float64)
 
-        return values
+    @property
+    def results(self):
+        return self.table.reshape((-1, 1))
 
     @results.setter
     def results(self, data):
@@ -569,8 +564,7 @@ class MemberForces:
         edof = 12   # degrees of freedom per element
         if isinstance(item, Element):
             try:
-                model = self._app.models.active_object
-                idxi = list(model.elements).index(item)
+                idxi = self._app.elements.index(item)
                 niqi, niqj = idxi*edof, idxi*edof + edof
 
                 # note that .results is a column vector
@@ -808,8 +802,7 @@ class Stresses:
         """Get nodal results."""
         if isinstance(item, Point):
             try:
-                model = self._app.models.active_object
-                idxi = list(model.points).index(item)
+                idxi = self._app.points.index(item)
 
                 # note that .results is a table, each row corresponds to node
                 # the stress terms are in arrays because of units
@@ -1099,6 +1092,19 @@ class LoadCase(BaseCase):
         return " + ".join(lbl)
 
 
+class CombMethod(IntEnum):
+    """The load combination methods."""
+    SCALAR = 0
+    SCALER = 0
+    ALGEBRAIC = 1
+    SRSS = 2
+    ABS = 3
+    SIGNMAX = 4
+    SIGNMIN = 5
+    MAX = 6
+    MIN = 7
+
+
 class LoadComb(BaseCase):
     """Combine primary loadcases using different combination methods.
 
@@ -1175,6 +1181,14 @@ class LoadComb(BaseCase):
     def method(self):
         return self._method
 
+    @property
+    def method_id(self):
+        """The combination method as a CombMethod."""
+        try:
+            return CombMethod[self._method.upper()]
+        except KeyError:
+            raise ValueError("invalid combination method '%s'" % self._method)
+
     @property
     def loadcases(self):
         return tuple(self._loadcases)
@@ -1183,6 +1197,17 @@ class LoadComb(BaseCase):
     def factors(self):
         return tuple(self._factors)
 
+    @property
+    def factor_vec(self):
+        """The factor of each loadcase as an array, loadcases without a
+        factor default to 1.
+        """
+        factors = np.ones(len(self._loadcases), dtype=np.float64)
+        n = min(len(self._factors), factors.size)
+        factors[:n] = self._factors[:n]
+
+        return factors
+
     @property
     def loadtypes(self):
         ltypes = []
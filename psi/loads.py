@@ -1056,10 +1056,7 @@ class LoadContainer(EntityContainer):
             active elements.
         """
         if elements is None:
-            elements = []
-
-            for element in self.app.elements.active_objects:
-                elements.append(element)
+            elements = list(self.app.elements.active_objects)
 
         for element in elements:
             element.loads.update(loads)
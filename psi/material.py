@@ -419,7 +419,7 @@ class Material(Entity, ActiveEntityMixin):
         return "%s %s" % (self.type, self.name)
 
 
-class MaterialContainer(EntityContainer, ActiveEntityContainerMixin):
+class MaterialContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(MaterialContainer, self).__init__()
@@ -449,10 +449,7 @@ class MaterialContainer(EntityContainer, ActiveEntityContainerMixin):
             >>> mat1.apply(p1)
         """
         if elements is None:
-            elements = []
-
-            for element in self.app.elements.active_objects:
-                elements.append(element)
+            elements = list(self.app.elements.active_objects)
 
         for element in elements:
             element.material = inst
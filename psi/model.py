@@ -16,15 +16,17 @@
 
 from __future__ import division
 
-from collections import OrderedDict
+import copyreg
 import gzip
+import io
 import pickle
 
 # from psi.settings import options
 from psi.settings import Configuration
 from psi.entity import (Entity, EntityContainer, ActiveEntityMixin,
                         ActiveEntityContainerMixin)
-from psi.topology import Geometry
+from psi.topology import Geometry, Vertex
+from psi.utils.orderedset import OrderedSet
 from psi.solvers.static import static
 from psi.solvers.dynamic import modal
 
@@ -36,6 +38,23 @@ from psi.solvers.dynamic import modal
 class Model(Entity, ActiveEntityMixin):
     """The model object contains all internal objects."""
 
+    _store_keys = ("points", "elements", "sections", "materials",
+                   "insulation", "codes", "sifs", "supports", "loads",
+                   "loadcases", "reports")
+
+    # app containers which keep track of the active object(s)
+    _active_keys = ("points", "elements", "sections", "materials",
+                    "insulation", "codes", "reports")
+
+    # active object attributes of older model files by app container name
+    _legacy_active = {"_active_point": "points",
+                      "_active_elements": "elements",
+                      "_active_section": "sections",
+                      "_active_material": "materials",
+                      "_active_insulation": "insulation",
+                      "_active_code": "codes",
+                      "_active_report": "reports"}
+
     def __init__(self, name):
         """Create a model instance.
 
@@ -51,27 +70,17 @@ class Model(Entity, ActiveEntityMixin):
 
         self._geometry = Geometry()
 
-        # internal containers
-        self._points = OrderedDict()
-        self._elements = OrderedDict()
-        self._sections = OrderedDict()
-        self._materials = OrderedDict()
-        self._insulation = OrderedDict()
-        self._codes = OrderedDict()
-        self._sifs = OrderedDict()
-        self._supports = OrderedDict()
-        self._loads = OrderedDict()
-        self._loadcases = OrderedDict()
-        self._reports = OrderedDict()
-
-        # active model objects
-        self._active_point = None
-        self._active_elements = set()
-        self._active_section = None
-        self._active_material = None
-        self._active_insulation = None
-        self._active_code = None
-        self._active_report = None
+        # internal containers by app container name
+        self._stores = {key: {} for key in Model._store_keys}
+        self._set_views()
+
+        # reverse name lookup of each internal container, id(inst) -> name
+        self._name_by_id = {key: {} for key in Model._store_keys}
+
+        # active model objects by app container name, the selected set of
+        # elements is kept instead of a single object
+        self._active = {key: None for key in Model._active_keys}
+        self._active["elements"] = set()
 
         super(Model, self).__init__(name)   # call last
         self.activate()     # activate on init
@@ -96,125 +105,131 @@ class Model(Entity, ActiveEntityMixin):
         """Get the geometry instance"""
         return self._geometry
 
-    @property
-    def points(self):
-        """Get the list of point"""
-        return self._points.values()
-
-    @property
-    def elements(self):
-        """Get the list of elements"""
-        return self._elements.values()
-
-    @property
-    def sections(self):
-        """Get the list of sections"""
-        return self._sections.values()
-
-    @property
-    def materials(self):
-        """Get the list of materials"""
-        return self._materials.values()
-
-    @property
-    def insulation(self):
-        """Get the list of insulation"""
-        return self._insulation.values()
-
-    @property
-    def codes(self):
-        """Get the list of codes"""
-        return self._codes.values()
-
-    @property
-    def sifs(self):
-        """Get the list of sifs"""
-        return self._sifs.values()
+    def _set_views(self):
+        """The points, elements, sections, etc. of the model are live views
+        of the internal containers set as plain attributes.
+        """
+        for key, objects in self._stores.items():
+            setattr(self, key, objects.values())
+
+    def __getstate__(self):
+        # dict views cannot be pickled and object ids are not persistent
+        # between sessions, both are recreated on load
+        state, slots = super(Model, self).__getstate__()
+        state = {key: val for key, val in state.items()
+                 if key not in Model._store_keys and key != "_name_by_id"}
+
+        return state, slots
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # older files keep each internal container and active object as
+            # a separate attribute
+            state["_stores"] = {key: dict(state.pop("_" + key, {}))
+                                for key in Model._store_keys}
+            state["_active"] = {key: state.pop(attr, None) for attr, key in
+                                Model._legacy_active.items()}
+            if state["_active"]["elements"] is None:
+                state["_active"]["elements"] = set()
+
+        super(Model, self).__setstate__(state)
+        self._set_views()
+
+        self._name_by_id = {}
+        for key, objects in self._stores.items():
+            self._name_by_id[key] = {id(val): name for name, val in
+                                     objects.items()}
+
+    def active(self, key):
+        """Get the active object of an app container given its name, for
+        example "points". For "elements" the set of active elements is
+        returned.
+        """
+        container = getattr(self.app, key)
+        if key == "elements":
+            return container.active_objects
 
-    @property
-    def supports(self):
-        """Get the list of supports"""
-        return self._supports.values()
+        return container.active_object
 
-    @property
-    def loads(self):
-        """Get the list of loads"""
-        return self._loads.values()
+    def set_active(self, key, obj):
+        """Set the active object of an app container given its name"""
+        container = getattr(self.app, key)
+        if key == "elements":
+            container._active_objects = obj
+        else:
+            container.active_object = obj
 
-    @property
-    def loadcases(self):
-        """Get the list of loadcases"""
-        return self._loadcases.values()
+    # the properties below are kept for backwards compatibility
 
     @property
     def active_point(self):
         """Get the active point instance"""
-        return self.app.points.active_object
+        return self.active("points")
 
     @active_point.setter
     def active_point(self, point):
         """Set the active point instance"""
-        self.app.points.active_object = point
+        self.set_active("points", point)
 
     @property
     def active_elements(self):
         """Get the list of active elements"""
-        return self.app.elements.active_objects
+        return self.active("elements")
 
     @active_elements.setter
     def active_elements(self, elements):
         """Set the list of active elements"""
-        self.app.elements.active_objects = elements
+        self.set_active("elements", elements)
 
     @property
     def active_section(self):
         """Get the active section"""
-        return self.app.sections.active_object
+        return self.active("sections")
 
     @active_section.setter
     def active_section(self, section):
         """Set the active section"""
-        self.app.sections.active_object = section
+        self.set_active("sections", section)
 
     @property
     def active_material(self):
         """Get the active material"""
-        return self.app.materials.active_object
+        return self.active("materials")
 
     @active_material.setter
     def active_material(self, material):
         """Set the active material"""
-        self.app.materials.active_object = material
+        self.set_active("materials", material)
 
     @property
     def active_insulation(self):
         """Get the active insulation"""
-        return self.app.insulation.active_object
+        return self.active("insulation")
 
     @active_insulation.setter
     def active_insulation(self, insulation):
         """Set the active insulation"""
-        self.app.insulation.active_object = insulation
+        self.set_active("insulation", insulation)
 
     @property
     def active_code(self):
         """Get the active code"""
-        return self.app.codes.active_object
+        return self.active("codes")
 
     @active_code.setter
     def active_code(self, code):
         """Set the active code"""
-        self.app.codes.active_object = code
+        self.set_active("codes", code)
 
     @property
-    def active_report(self, code):
+    def active_report(self):
         """Get the active report"""
-        return self.app.reports.active_object
+        return self.active("reports")
 
     @active_report.setter
     def active_report(self, report):
         """Set the active report"""
-        self.app.reports.active_object = report
+        self.set_active("reports", report)
 
     @property
     def parent(self):
@@ -238,7 +253,120 @@ class Model(Entity, ActiveEntityMixin):
         self.parent.analyze(self, mode)
 
 
-class ModelContainer(EntityContainer, ActiveEntityContainerMixin):
+class ModelPickler(pickle.Pickler):
+    """Pickle a model without the application instance.
+
+    Loadcase results keep a reference to the application which is stored as
+    a persistent id instead of being pickled along with the model.
+    """
+
+    def persistent_id(self, obj):
+        if obj is Model._app:
+            return "app"
+        return None
+
+
+class _LegacyApp(object):
+    """Placeholder for the application pickled along with older model files,
+    it is replaced by the running application when the model is upgraded.
+    """
+
+    def __setstate__(self, state):
+        pass
+
+
+def _reconstructor(cls, base, state):
+    """Create the objects of older model files"""
+    obj = copyreg._reconstructor(cls, base, state)
+    if isinstance(obj, Entity):
+        # entities may be hashed before their state is set
+        obj._name = None
+        obj._type = cls.__name__
+        obj._hash = hash(obj._key())
+
+    return obj
+
+
+class ModelUnpickler(pickle.Unpickler):
+    """Unpickle a model using the running application instance.
+
+    Older model files are pickled with protocol 1 and include the
+    application, legacy is set if one is loaded.
+    """
+
+    legacy = False
+
+    def find_class(self, module, name):
+        if (module, name) == ("psi.app", "App"):
+            return _LegacyApp
+
+        cls = super(ModelUnpickler, self).find_class(module, name)
+        if cls is copyreg._reconstructor:
+            self.legacy = True
+            return _reconstructor
+
+        return cls
+
+    def persistent_load(self, pid):
+        if pid == "app":
+            return Model._app
+        raise pickle.UnpicklingError("unsupported persistent object")
+
+
+def upgrade(inst):
+    """Upgrade a model loaded from an older file.
+
+    The names of the objects were only kept by the internal containers of
+    the model and the object hashes depend on them, so the hashed
+    containers are rebuilt after the names are set.
+    """
+    app = Model._app
+
+    for objects in inst._stores.values():
+        for name, obj in objects.items():
+            obj._name = name
+
+    # find all the objects reachable from the model
+    found = {}
+    stack = [inst]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in found:
+            continue
+        found[id(obj)] = obj
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, OrderedSet)):
+            stack.extend(obj)
+        elif type(obj).__module__.startswith("psi."):
+            attrs = getattr(obj, "__dict__", {})
+            for key, val in attrs.items():
+                if isinstance(val, _LegacyApp):
+                    attrs[key] = app
+            stack.extend(attrs.values())
+
+    for obj in found.values():
+        if isinstance(obj, Entity):
+            obj._hash = hash(obj._key())
+        elif isinstance(obj, Vertex):
+            obj.nedges = len(obj.edges)
+
+    for obj in found.values():
+        if isinstance(obj, OrderedSet):
+            OrderedSet.__init__(obj, list(obj))
+        elif isinstance(obj, set):
+            items = list(obj)
+            obj.clear()
+            obj.update(items)
+        elif isinstance(obj, dict):
+            items = list(obj.items())
+            obj.clear()
+            obj.update(items)
+
+
+class ModelContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(ModelContainer, self).__init__()
@@ -251,8 +379,13 @@ class ModelContainer(EntityContainer, ActiveEntityContainerMixin):
         model settings with application settings even if versions are not the
         same.
         """
-        with gzip.open(fname, 'rb') as fp:
-            name, inst = pickle.load(fp)   # model instance
+        with gzip.open(fname, 'rb') as gf:
+            # read the decompressed stream in large chunks
+            fp = io.BufferedReader(gf, buffer_size=1 << 20)
+            unpickler = ModelUnpickler(fp)
+            name, inst = unpickler.load()   # model instance
+            if unpickler.legacy:
+                upgrade(inst)
 
             # the user units should be set here
             ##
@@ -264,43 +397,48 @@ class ModelContainer(EntityContainer, ActiveEntityContainerMixin):
     def activate(self, inst):
         app = self.app
 
-        app.models._active_object = inst
-
-        app.points._objects = inst._points
-        app.points._active_object = inst._active_point
+        # the app containers already hold the active objects
+        current = self._active_object
+        if current is inst:
+            return
 
-        app.elements._objects = inst._elements
-        app.elements._active_objects = inst._active_elements
+        # keep the active objects of the model being switched out
+        if current is not None:
+            self._store_active(current)
 
-        app.sections._objects = inst._sections
-        app.sections._active_object = inst._active_section
-
-        app.materials._objects = inst._materials
-        app.materials._active_object = inst._active_material
-
-        app.insulation._objects = inst._insulation
-        app.insulation._active_object = inst._active_insulation
-
-        app.codes._objects = inst._codes
-        app.codes._active_object = inst._active_code
-
-        app.sifs._objects = inst._sifs
-
-        app.supports._objects = inst._supports
-
-        app.loads._objects = inst._loads
+        app.models._active_object = inst
 
-        app.loadcases._objects = inst._loadcases
+        for key, objects in inst._stores.items():
+            getattr(app, key)._set_objects(objects, inst._name_by_id[key])
 
-        app.reports._objects = inst._reports
-        app.reports._active_object = inst._active_report
+        for key, obj in inst._active.items():
+            inst.set_active(key, obj)
 
-        # add others here
+    def _store_active(self, inst):
+        """Copy the active objects of the app containers to the model"""
+        for key in inst._active:
+            inst._active[key] = inst.active(key)
 
     def close(self, inst):
         """Closes a model"""
+        is_active = inst is self._active_object
         self.delete(inst)
 
+        # release the model objects right away
+        for key, objects in inst._stores.items():
+            name_by_id = inst._name_by_id[key]
+            objects.clear()
+            name_by_id.clear()
+
+            container = getattr(self.app, key)
+            if container.objects is objects:
+                container._set_objects(objects, name_by_id)
+
+        # the active objects belong to the closed model
+        if is_active:
+            for key in inst._active:
+                inst.set_active(key, set() if key == "elements" else None)
+
     def save(self, inst=None):
         """Saves a gunzipped pickled model to disk.  This will overwrite any
         existing file with the same name inside the directory.  If an instance
@@ -313,8 +451,13 @@ class ModelContainer(EntityContainer, ActiveEntityContainerMixin):
 
     def save_as(self, inst, fname):
         """Save a model with a different filename"""
-        with gzip.GzipFile(fname, 'wb') as fp:
-            fp.write(pickle.dumps((inst.name, inst), 1))
+        if inst is self._active_object:
+            self._store_active(inst)
+
+        # a low compression level is much faster for a small size penalty
+        with gzip.GzipFile(fname, 'wb', compresslevel=1) as fp:
+            pickler = ModelPickler(fp, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.dump((inst.name, inst))
         return inst
 
     def analyze(self, inst, mode="static"):
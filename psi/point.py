@@ -155,7 +155,7 @@ class Point(Entity, ActiveEntityMixin):
         return self.app.points
 
 
-class PointManager(EntityContainer, ActiveEntityContainerMixin):
+class PointManager(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(PointManager, self).__init__()
@@ -363,7 +363,7 @@ class Codes(Report):
                                             ))
 
 
-class ReportContainer(EntityContainer, ActiveEntityContainerMixin):
+class ReportContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(ReportContainer, self).__init__()
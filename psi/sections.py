@@ -423,7 +423,7 @@ class Beam(Section):
         return self.izz + self.iyy
 
 
-class SectionContainer(EntityContainer, ActiveEntityContainerMixin):
+class SectionContainer(ActiveEntityContainerMixin, EntityContainer):
 
     def __init__(self):
         super(SectionContainer, self).__init__()
@@ -454,10 +454,7 @@ class SectionContainer(EntityContainer, ActiveEntityContainerMixin):
             >>> sections.apply(p1)
         """
         if elements is None:
-            elements = []
-
-            for element in self.app.elements.active_objects:
-                elements.append(element)
+            elements = list(self.app.elements.active_objects)
 
         for element in elements:
             element.section = inst
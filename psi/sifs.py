@@ -26,11 +26,21 @@ from psi import units
 class SIF(Entity):
     """A tee type intersection or a welding connection"""
 
+    # the unit managed dimensions of the derived sifs are stored in the
+    # instance dict, the derived sifs do not define slots
+    __slots__ = ("point", "element")
+
     def __init__(self, name, point):
         super(SIF, self).__init__(name)
         self.point = point
         self.element = None
 
+    def __getstate__(self):
+        state, slots = super(SIF, self).__getstate__()
+        slots.update(point=self.point, element=self.element)
+
+        return state, slots
+
     @property
     def parent(self):
         """Returns the SIFContainer instance."""
@@ -58,7 +68,7 @@ class Intersection(SIF):
     @property
     def is_intersection(self):
         """A tee type intersection"""
-        return len(self.app.points(self.point).vertex.edges) == 3
+        return self.app.points(self.point).vertex.nedges == 3
 
     def header(self):
         """Header element of intersection"""
@@ -78,7 +88,7 @@ class Connection(SIF):
     @property
     def is_connection(self):
         """A welding connection"""
-        return len(self.app.points(self.point).vertex.edges) == 2
+        return self.app.points(self.point).vertex.nedges == 2
 
 
 @units.define(do="length", tn="length", dob="length", rx="length", tc="length")
@@ -274,22 +284,20 @@ class ButtWeld(Connection):
     """Buttwelded piping connections"""
 
     def __init__(self, name, point):
-        super(Welding, self).__init__(name, point)
+        super(ButtWeld, self).__init__(name, point)
 
 
 class SIFContainer(EntityContainer):
 
-    def __init__(self):
-        super(SIFContainer, self).__init__()
-        self.Welding = Welding
-        self.Unreinforced = Unreinforced
-        self.Reinforced = Reinforced
-        self.Weldolet = Weldolet
-        self.Sockolet = Sockolet
-        self.Sweepolet = Sweepolet
-        self.ButtWeld = ButtWeld
-
-    def apply(self, sifs=[], elements=[]):
+    Welding = Welding
+    Unreinforced = Unreinforced
+    Reinforced = Reinforced
+    Weldolet = Weldolet
+    Sockolet = Sockolet
+    Sweepolet = Sweepolet
+    ButtWeld = ButtWeld
+
+    def apply(self, sifs=[], elements=None):
         """Apply sifs to elements.
 
         A reference for each sif is assigned to each element.
@@ -306,6 +314,9 @@ class SIFContainer(EntityContainer):
             A list of elements. If elements is None, sifs are applied to all
             active elements.
         """
+        if elements is None:
+            elements = list(self.app.elements.active_objects)
+
         for sif, element in zip(sifs, elements):
             sif.element = element
             element.sifs.add(sif)
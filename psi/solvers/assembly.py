@@ -0,0 +1,137 @@
+# Pipe Stress Infinity (PSI) - The pipe stress analysis and design software.
+# Copyright (c) 2021 Denis Gomes <denisgomes@consultant.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Assembly of the system matrices from the element matrices.
+
+The model topology is stored as contiguous arrays so that the element
+matrices can be scattered into the system matrices in one step instead of
+one element at a time.
+"""
+
+import numpy as np
+
+
+def point_index(points):
+    """Return a dict mapping each point to its index in the points list"""
+    return {point: idx for idx, point in enumerate(points)}
+
+
+def connectivity(nodes, elements):
+    """The element connectivity array.
+
+    Parameters
+    ----------
+    nodes : dict
+        The point index of each point, see point_index.
+
+    elements : list
+        The model elements.
+
+    Each row contains the from point and to point index of an element.
+    """
+    conn = np.empty((len(elements), 2), dtype=np.int64)
+    for i, element in enumerate(elements):
+        conn[i] = nodes[element.from_point], nodes[element.to_point]
+
+    return conn
+
+
+def element_dofs(conn, ndof=6):
+    """The system degrees of freedom of each element.
+
+    Each row contains the system dofs of the element nodes in the same order
+    as the rows and columns of the element matrices.
+    """
+    ne, en = conn.shape
+    dofs = conn[:, :, None]*ndof + np.arange(ndof)
+
+    return dofs.reshape(ne, en*ndof)
+
+
+def pattern(edofs, n):
+    """The nonzero pattern of a system matrix of size n.
+
+    Returns the flat positions of the nonzero entries of the system matrix
+    in ascending order and, for every entry of the element matrices, the
+    offset of the nonzero it is added to. The pattern only depends on the
+    topology so it can be computed once and shared by all the system
+    matrices of an analysis.
+    """
+    idx = edofs[:, :, None]*n + edofs[:, None, :]
+    nz, offsets = np.unique(idx.ravel(), return_inverse=True)
+
+    return nz, offsets.reshape(idx.shape)
+
+
+def assemble(Ks, edofs, kes, nzpat=None):
+    """Add the element matrices to the system matrix in place.
+
+    Parameters
+    ----------
+    Ks : ndarray
+        The system matrix.
+
+    edofs : ndarray
+        The system dofs of each element, see element_dofs.
+
+    kes : ndarray
+        The element matrices in global coordinates with shape (ne, edof,
+        edof).
+
+    nzpat : tuple
+        The nonzero pattern of the system matrix, see pattern. It is computed
+        if not given.
+
+    The element matrices are computed into their own slice of kes first and
+    then reduced onto the nonzero entries of the system matrix in a single
+    pass, at the cost of holding edof*edof values per element in memory
+    (about 11 MB for 10000 elements).
+    """
+    if nzpat is None:
+        nzpat = pattern(edofs, Ks.shape[1])
+    nz, offsets = nzpat
+
+    Ks.flat[nz] += np.bincount(offsets.ravel(), weights=kes.ravel(),
+                               minlength=nz.size)
+
+    return Ks
+
+
+def rotate(kls, dcs):
+    """Transform a stack of local element matrices to global coordinates.
+
+    Parameters
+    ----------
+    kls : ndarray
+        The element matrices in local coordinates with shape (ne, 12, 12).
+
+    dcs : ndarray
+        The direction cosines of each element with shape (ne, 3, 3).
+
+    The transformation matrix T is block diagonal with the direction cosines
+    repeated along the diagonal, so T.T @ k @ T is computed one 3x3 block at
+    a time for all the elements at once rather than with two full 12x12
+    products per element.
+    """
+    ne, edof, _ = kls.shape
+    nb = edof // 3
+
+    # (ne, row block, col block, 3, 3)
+    kb = kls.reshape(ne, nb, 3, nb, 3).transpose(0, 1, 3, 2, 4)
+    dc = dcs[:, None, None, :, :]
+    kgb = dc.transpose(0, 1, 2, 4, 3) @ kb @ dc
+
+    return kgb.transpose(0, 1, 3, 2, 4).reshape(ne, edof, edof)
@@ -17,329 +17,257 @@
 """Element code checking"""
 
 
-from itertools import zip_longest
-import math
+from collections import OrderedDict
+from contextlib import ExitStack
 
 import numpy as np
 
-from psi.loadcase import LoadCase, LoadComb
+from psi.loadcase import LoadCase, LoadComb, CombMethod
+from psi.solvers.assembly import point_index, connectivity
 from psi import units
 
 
+def _absmax(stack, axis=0):
+    """The values with the largest magnitude with the sign tacked on, ties
+    go to the last loadcase as for LoadComb.
+    """
+    stack = np.flip(stack, axis)
+    idx = np.expand_dims(np.abs(stack).argmax(axis), axis)
+    return np.take_along_axis(stack, idx, axis).squeeze(axis)
+
+
+def _absmin(stack, axis=0):
+    """The values with the smallest magnitude with the sign tacked on, ties
+    go to the last loadcase as for LoadComb.
+    """
+    stack = np.flip(stack, axis)
+    idx = np.expand_dims(np.abs(stack).argmin(axis), axis)
+    return np.take_along_axis(stack, idx, axis).squeeze(axis)
+
+
+# the stacked loadcase stresses of a load combination are combined by
+# applying the unary op and reducing over the loadcases followed by the post
+# op if any, note the sign of the factor has no effect for srss, the
+# algebraic method is handled separately since the stresses are derived from
+# the combined forces
+_COMBINE = {
+    CombMethod.SCALAR: (None, np.sum),
+    CombMethod.SRSS: (np.square, np.sum),
+    CombMethod.ABS: (np.abs, np.sum),
+    CombMethod.SIGNMAX: (None, np.max),
+    CombMethod.SIGNMIN: (None, np.min),
+    CombMethod.MAX: (None, _absmax),
+    CombMethod.MIN: (None, _absmin),
+}
+
+_POST = {
+    CombMethod.SRSS: np.sqrt,
+}
+
+
+def combine(method, stack):
+    """Combine the stresses stacked along the first axis using the load
+    combination method.
+    """
+    try:
+        unary, reduce = _COMBINE[method]
+    except KeyError:
+        raise ValueError("stresses can not be combined using the '%s' "
+                         "method" % CombMethod(method).name.lower())
+
+    if unary is not None:
+        stack = unary(stack)
+    values = reduce(stack, axis=0)
+
+    post = _POST.get(method)
+    if post is not None:
+        values = post(values)
+
+    return values
+
+
 def perform_code_check(model):
     # similar to nodal dof matrix
     points = list(model.points)
-    nn = len(model.points)
-    for i, loadcase in enumerate(model.loadcases):  # including LoadCombs
-        S = np.zeros((nn, 15), dtype=np.float64)    # stresses
-        C = []  # code used at each node
-        for element in model.elements:
-            element_codecheck(points, loadcase, element, S)
-            C.extend(2 * [element.code.label])
-        loadcase.stresses.results = (S[:, :], C)
+    elements = list(model.elements)
+    nn = len(points)
+    ne = len(elements)
+
+    # node indices of each element
+    conn = connectivity(point_index(points), elements)
+
+    # elements are checked together by the code assigned to them, each
+    # group is independent of the others and only the node stresses are
+    # merged at the end
+    groups = OrderedDict()
+    for i, element in enumerate(elements):
+        groups.setdefault(element.code, []).append(i)
+
+    tasks = []
+    for code, idx in groups.items():
+        idx = np.array(idx, dtype=np.int64)
+        tasks.append((code, idx, [elements[i] for i in idx], conn[idx]))
+
+    C = []  # code used at each node
+    for element in elements:
+        C.extend(2 * [element.code.label])
+
+    # sifs and section properties are the same for all loadcases
+    with ExitStack() as stack:
+        for code in groups:
+            stack.enter_context(code.cached())
+
+        for loadcase in model.loadcases:    # including LoadCombs
+            # stresses at node i and j of each element
+            Si = np.empty((ne, 15), dtype=np.float64)
+            Sj = np.empty((ne, 15), dtype=np.float64)
+            for code, idx, group, group_conn in tasks:
+                Si[idx], Sj[idx] = element_codecheck(code, group, loadcase,
+                                                     group_conn)
+
+            S = node_stresses(nn, conn, Si, Sj)
+            loadcase.stresses.results = (S[:, :], C)
+
+
+def node_stresses(nn, conn, Si, Sj):
+    """The worst code stress at each node.
+
+    Si and Sj are the stresses at node i and j of each element. For each
+    node the row with the largest positive code ratio is kept, ties go to the
+    first element in the list. Nodes without one are left as zeros.
+    """
+    S = np.zeros((nn, 15), dtype=np.float64)    # stresses
+
+    # candidate rows in element order, node i before node j
+    nodes = conn.ravel()
+    rows = np.stack([Si, Sj], axis=1).reshape(-1, 15)
+    ratio = rows[:, 9]
+
+    # sort the candidates by node, then by descending ratio and position so
+    # that the winner of each node comes first
+    cand = np.flatnonzero(ratio > 0)
+    cand = cand[np.lexsort((cand, -ratio[cand], nodes[cand]))]
+    first = np.ones(cand.size, dtype=bool)
+    first[1:] = nodes[cand[1:]] != nodes[cand[:-1]]
+
+    win = cand[first]
+    S[nodes[win]] = rows[win]
+
+    return S
 
 
-def element_codecheck(points, loadcase, element, S):
+def element_codecheck(code, elements, loadcase, conn):
     """Perform element code checking based on the assigned code for primary
     load cases and load combinations.
+
+    The elements are checked at once and must all use the given code. The
+    stresses at node i and j of each element are returned as two tables with
+    one row per element.
     """
-    ndof = 6
-    idxi = points.index(element.from_point)
-    idxj = points.index(element.to_point)
+    ne = len(elements)
 
-    # node and corresponding dof (start, finish)
-    niqi, niqj = idxi*ndof, idxi*ndof + ndof
-    njqi, njqj = idxj*ndof, idxj*ndof + ndof
+    # node i and node j of all the elements are checked in a single pass,
+    # the rows of node i come first followed by the rows of node j
+    ends = elements + elements
+    points = ([element.from_point for element in elements] +
+              [element.to_point for element in elements])
+    idx = conn.T.ravel()
 
     with units.Units(user_units="code_english"):
         # Note: units are changed to code_english for the moments
         # to have units of inch*lbf per code requirement
         # code equations are units specific, i.e. imperial or si
 
+        # fitting and nodal sifs, sum together, take max or average?
+        sifi = code.sifi_batch(ends, points)
+        sifo = code.sifo_batch(ends, points)
+
         if isinstance(loadcase, LoadCase):
-            fori = loadcase.forces.results[niqi:niqj, 0]
-            forj = loadcase.forces.results[njqi:njqj, 0]
+            forces = loadcase.forces.table[idx]
 
             # code stresses per element node i and j for each loadcase
-            shoop = element.code.shoop(element, loadcase)
+            shoop = np.tile(code.shoop_batch(elements, loadcase), 2)
 
             # pressure stress is same at both nodes
-            slp = element.code.slp(element, loadcase)
-
-            saxi = element.code.sax(element, fori)
-            saxj = element.code.sax(element, forj)
-
-            stsi = element.code.sts(element, fori)
-            stsj = element.code.sts(element, forj)
-
-            stori = element.code.stor(element, fori)
-            storj = element.code.stor(element, forj)
+            slp = np.tile(code.slp_batch(elements, loadcase), 2)
 
-            slbi = element.code.slb(element, element.from_point, fori)
-            slbj = element.code.slb(element, element.to_point, forj)
+            sax = code.sax_batch(ends, forces)
+            sts = code.sts_batch(ends, forces)
+            stor = code.stor_batch(ends, forces)
+            slb = code.slb_batch(ends, points, forces)
 
             # total code stress
-            sli = element.code.sl(element, loadcase, element.from_point, fori)
-            slj = element.code.sl(element, loadcase, element.to_point, forj)
+            sl = code.sl_batch(ends, loadcase, points, forces)
 
-            # fitting and nodal sifs, sum together, take max or average?
-            sifi_i = element.code.sifi(element, element.from_point)
-            sifo_i = element.code.sifo(element, element.from_point)
-            sifi_j = element.code.sifi(element, element.to_point)
-            sifo_j = element.code.sifo(element, element.to_point)
-
-            sallowi = element.code.sallow(element, loadcase, element.from_point,
-                                          fori)
-            sallowj = element.code.sallow(element, loadcase, element.to_point,
-                                          forj)
-
-            try:
-                sratioi = sli / sallowi     # code ratio at node i
-                sratioj = slj / sallowj     # code ratio at node j
-            except ZeroDivisionError:
-                sratioi = 0
-                sratioj = 0
-
-            # derived extended stresses
-            s1i = element.code.s1(sli, shoop, stori, stsi)
-            s1j = element.code.s1(slj, shoop, storj, stsj)
-
-            s2i = element.code.s2(sli, shoop, stori, stsi)
-            s2j = element.code.s2(slj, shoop, storj, stsj)
-
-            smsi = element.code.max_shear(s1i, s2i)
-            smsj = element.code.max_shear(s1j, s2j)
-
-            sinti = element.code.sint(smsi)
-            sintj = element.code.sint(smsj)
-
-            svoni = element.code.svon(s1i, s2i)
-            svonj = element.code.svon(s1j, s2j)
+            sallow = code.sallow_batch(ends, loadcase, points, forces)
 
         elif isinstance(loadcase, LoadComb):
-            # fitting and nodal sifs, sum together, take max or average?
-            sifi_i = element.code.sifi(element, element.from_point)
-            sifo_i = element.code.sifo(element, element.from_point)
-            sifi_j = element.code.sifi(element, element.to_point)
-            sifo_j = element.code.sifo(element, element.to_point)
-
             loadcomb = loadcase
-            shoop_list, slp_list = [], []
-            saxi_list, stsi_list, stori_list, slbi_list, sli_list = [], [], [], [], []
-            saxj_list, stsj_list, storj_list, slbj_list, slj_list = [], [], [], [], []
-            for factor, loadcase in zip_longest(loadcomb.factors,
-                                                loadcomb.loadcases,
-                                                fillvalue=1):
-                fori = loadcase.forces.results[niqi:niqj, 0]
-                forj = loadcase.forces.results[njqi:njqj, 0]
-
-                shoop_list.append(factor * element.code.shoop(element, loadcase))
-                slp_list.append(factor * element.code.slp(element, loadcase))
-
-                saxi_list.append(factor * element.code.sax(element, fori))
-                saxj_list.append(factor * element.code.sax(element, forj))
-
-                stsi_list.append(factor * element.code.sts(element, fori))
-                stsj_list.append(factor * element.code.sts(element, forj))
-
-                stori_list.append(factor * element.code.stor(element, fori))
-                storj_list.append(factor * element.code.stor(element, forj))
-
-                slbi_list.append(factor * element.code.slb(element,
-                                 element.from_point, fori))
-                slbj_list.append(factor * element.code.slb(element,
-                                 element.to_point, forj))
-
-                # total code stress
-                sli_list.append(element.code.sl(element, loadcase,
-                                element.from_point, fori))
-                slj_list.append(element.code.sl(element, loadcase,
-                                element.to_point, forj))
-
-            if loadcomb.method == "scaler":
-                shoop = sum(shoop_list)
-                slp = sum(slp_list)
-
-                saxi = sum(saxi_list)
-                saxj = sum(saxj_list)
-
-                stsi = sum(stsi_list)
-                stsj = sum(stsj_list)
-
-                stori = sum(stori_list)
-                storj = sum(storj_list)
-
-                slbi = sum(slbi_list)
-                slbj = sum(slbj_list)
 
-                sli = sum(sli_list)
-                slj = sum(slj_list)
-
-            elif loadcomb.method == "algebraic":
+            # the stresses of each loadcase are stacked with shape
+            # (loadcases, stress terms, nodes), the terms are in the order
+            # they are unpacked below
+            rows = []
+            for loadcase in loadcomb.loadcases:
+                forces = loadcase.forces.table[idx]
+
+                rows.append(np.vstack([
+                    np.tile(code.shoop_batch(elements, loadcase), 2),
+                    np.tile(code.slp_batch(elements, loadcase), 2),
+                    code.sax_batch(ends, forces),
+                    code.sts_batch(ends, forces),
+                    code.stor_batch(ends, forces),
+                    code.slb_batch(ends, points, forces),
+                    # total code stress
+                    code.sl_batch(ends, loadcase, points, forces),
+                ]))
+            stack = np.stack(rows)
+
+            # all the terms except the total code stress are factored
+            stack[:, :-1] *= loadcomb.factor_vec[:, None, None]
+
+            method = loadcomb.method_id
+            if method == CombMethod.ALGEBRAIC:
                 # stress per algebraic combination of forces
-                fori = loadcomb.forces.results[niqi:niqj, 0]
-                forj = loadcomb.forces.results[njqi:njqj, 0]
-
-                shoop = sum(shoop_list)
-                slp = sum(slp_list)
-
-                saxi = element.code.sax(element, fori)
-                saxj = element.code.sax(element, forj)
+                forces = loadcomb.forces.table[idx]
 
-                stsi = element.code.sts(element, fori)
-                stsj = element.code.sts(element, forj)
+                shoop, slp = stack[:, :2].sum(0)
 
-                stori = element.code.stor(element, fori)
-                storj = element.code.stor(element, forj)
-
-                slbi = element.code.slb(element, element.from_point, fori)
-                slbj = element.code.slb(element, element.to_point, forj)
+                sax = code.sax_batch(ends, forces)
+                sts = code.sts_batch(ends, forces)
+                stor = code.stor_batch(ends, forces)
+                slb = code.slb_batch(ends, points, forces)
 
                 # total code stress
-                sli = element.code.sl(element, loadcase,
-                                      element.from_point, fori)
-                slj = element.code.sl(element, loadcase,
-                                      element.to_point, forj)
-
-            elif loadcomb.method == "srss":
-                # note: sign of factor has no effect, always positive
-                shoop = sum([s**2 for s in shoop_list])
-                slp = sum([s**2 for s in slp_list])
-
-                saxi = sum([s**2 for s in saxi_list])
-                saxj = sum([s**2 for s in saxj_list])
-
-                stsi = sum([s**2 for s in stsi_list])
-                stsj = sum([s**2 for s in stsj_list])
-
-                stori = sum([s**2 for s in stori_list])
-                storj = sum([s**2 for s in storj_list])
-
-                slbi = sum([s**2 for s in slbi_list])
-                slbj = sum([s**2 for s in slbj_list])
-
-                sli = sum([s**2 for s in sli_list])
-                slj = sum([s**2 for s in slj_list])
-
-            elif loadcomb.method == "abs":
-                shoop = sum([abs(s) for s in shoop_list])
-                slp = sum([abs(s) for s in slp_list])
-
-                saxi = sum([abs(s) for s in saxi_list])
-                saxj = sum([abs(s) for s in saxj_list])
-
-                stsi = sum([abs(s) for s in stsi_list])
-                stsj = sum([abs(s) for s in stsj_list])
-
-                stori = sum([abs(s) for s in stori_list])
-                storj = sum([abs(s) for s in storj_list])
-
-                slbi = sum([abs(s) for s in slbi_list])
-                slbj = sum([abs(s) for s in slbj_list])
-
-                sli = sum([abs(s) for s in sli_list])
-                slj = sum([abs(s) for s in slj_list])
-
-            elif loadcomb.method == "signmax":
-                shoop = max(shoop_list)
-                slp = max(slp_list)
-
-                saxi = max(saxi_list)
-                saxj = max(saxj_list)
-
-                stsi = max(stsi_list)
-                stsj = max(stsj_list)
-
-                stori = max(stori_list)
-                storj = max(storj_list)
+                sl = code.sl_batch(ends, loadcase, points, forces)
 
-                slbi = max(slbi_list)
-                slbj = max(slbj_list)
+            else:
+                (shoop, slp, sax, sts, stor, slb,
+                 sl) = combine(method, stack)
 
-                sli = max(sli_list)
-                slj = max(slj_list)
-
-            elif loadcomb.method == "signmin":
-                shoop = min(shoop_list)
-                slp = min(slp_list)
-
-                saxi = min(saxi_list)
-                saxj = min(saxj_list)
-
-                stsi = min(stsi_list)
-                stsj = min(stsj_list)
-
-                stori = min(stori_list)
-                storj = min(storj_list)
-
-                slbi = min(slbi_list)
-                slbj = min(slbj_list)
-
-                sli = min(sli_list)
-                slj = min(slj_list)
-
-            # take the sqrt last
-            if loadcomb.method == "srss":
-                shoop = math.sqrt(shoop)
-                slp = math.sqrt(slp)
-
-                saxi = math.sqrt(saxi)
-                saxj = math.sqrt(saxj)
-
-                stsi = math.sqrt(stsi)
-                stsj = math.sqrt(stsj)
-
-                stori = math.sqrt(stori)
-                storj = math.sqrt(storj)
-
-                slbi = math.sqrt(slbi)
-                slbj = math.sqrt(slbj)
-
-                sli = math.sqrt(sli)
-                slj = math.sqrt(slj)
-
-            # calculate derived stresses from combined stresses
-            s1i = element.code.s1(sli, shoop, stori, stsi)
-            s1j = element.code.s1(slj, shoop, storj, stsj)
-
-            s2i = element.code.s2(sli, shoop, stori, stsi)
-            s2j = element.code.s2(slj, shoop, storj, stsj)
-
-            smsi = element.code.max_shear(s1i, s2i)
-            smsj = element.code.max_shear(s1j, s2j)
-
-            sinti = element.code.sint(smsi)
-            sintj = element.code.sint(smsj)
+            # calculate loadcomb allowable
+            sallow = code.sallow_batch(ends, loadcomb, points, forces,
+                                       stype=loadcomb.stype)
 
-            svoni = element.code.svon(s1i, s2i)
-            svonj = element.code.svon(s1j, s2j)
+        # the code ratio is zero where there is no allowable stress
+        sratio = np.divide(sl, sallow, out=np.zeros_like(sl),
+                           where=sallow != 0)
 
-            # calculate loadcomb allowable
-            sallowi = element.code.sallow(element, loadcomb, element.from_point,
-                                          fori)
-            sallowj = element.code.sallow(element, loadcomb, element.to_point,
-                                          forj)
-
-            try:
-                sratioi = sli / sallowi     # code ratio at node i
-                sratioj = slj / sallowj     # code ratio at node j
-            except ZeroDivisionError:
-                sratioi = 0
-                sratioj = 0
+        # derived extended stresses
+        s1 = code.s1(sl, shoop, stor, sts)
+        s2 = code.s2(sl, shoop, stor, sts)
+        sms = code.max_shear(s1, s2)
+        sint = code.sint(sms)
+        svon = code.svon(s1, s2)
 
         # hoop, sax, stor, slp, slb, sl, sifi, sifj, sallow, ir
-        # take the worst code stress at node
-        if sratioi > S[idxi, 9]:
-            S[idxi, :15] = (shoop, saxi, stori, slp, slbi, sli,
-                            sifi_i, sifo_i, sallowi, sratioi,
-                            s1i, s2i, smsi, sinti, svoni)
-
-        if sratioj > S[idxj, 9]:
-            S[idxj, :15] = (shoop, saxj, storj, slp, slbj, slj,
-                            sifi_j, sifo_j, sallowj, sratioj,
-                            s1j, s2j, smsj, sintj, svonj)
+        S = np.column_stack(np.broadcast_arrays(
+            shoop, sax, stor, slp, slb, sl, sifi, sifo, sallow, sratio, s1,
+            s2, sms, sint, svon))
 
         # TODO : Implement Ma, Mb and Mc calculation loads
         # for each loadcase where Ma is for sustained, Mb is
         # for occasional and Mc is for expansion type loads
         # This applies to code stress calculations only
+
+        return S[:ne], S[ne:]
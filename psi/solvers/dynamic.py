@@ -25,6 +25,9 @@ from functools import partial
 import numpy as np
 from scipy.sparse import linalg as splinalg
 
+from psi.solvers.assembly import (point_index, connectivity, element_dofs,
+                                  assemble, pattern)
+
 
 def modal(model, nmodes=3):
     """Run a modal analysis of the system extracting frequencies and mode
@@ -85,11 +88,22 @@ def modal(model, nmodes=3):
 
     ndof = 6    # nodal degrees of freedom
     en = 2      # number of nodes per element
+    edof = en * ndof
     nn = len(model.points)
+    ne = len(model.elements)
     lc = len(model.loadcases)
 
     # similar to nodal dof matrix
     points = list(model.points)
+    elements = list(model.elements)
+
+    # element connectivity and corresponding system dofs
+    conn = connectivity(point_index(points), elements)
+    edofs = element_dofs(conn, ndof)
+
+    # element mass and stiffness matrices in global coordinates
+    megs = np.empty((ne, edof, edof), dtype=np.float64)
+    kegs = np.empty((ne, edof, edof), dtype=np.float64)
 
     # global system stiffness matrix
     Ks = np.zeros((nn*ndof, nn*ndof), dtype=np.float64)
@@ -98,29 +112,16 @@ def modal(model, nmodes=3):
     zeros = partial(np.zeros, (12, 1))
     fixed_dof = defaultdict(zeros)
 
-    for element in model.elements:
-        idxi = points.index(element.from_point)
-        idxj = points.index(element.to_point)
+    for i, element in enumerate(elements):
+        idxi, idxj = conn[i]
 
         # node and corresponding dof (start, finish), used to define the
         # elements of the system stiffness and force matrices
         niqi, niqj = idxi*ndof, idxi*ndof + ndof
         njqi, njqj = idxj*ndof, idxj*ndof + ndof
 
-        meg = element.mglobal()
-        keg = element.kglobal(model.settings.tref)     # room temp
-
-        # assemble global mass matrix, quadrant 1 to 4
-        Ms[niqi:niqj, niqi:niqj] += meg[:6, :6]         # 2nd
-        Ms[niqi:niqj, njqi:njqj] += meg[:6, 6:12]       # 1st
-        Ms[njqi:njqj, niqi:niqj] += meg[6:12, :6]       # 3rd
-        Ms[njqi:njqj, njqi:njqj] += meg[6:12, 6:12]     # 4th
-
-        # assemble global stiffness matrix, quadrant 1 to 4
-        Ks[niqi:niqj, niqi:niqj] += keg[:6, :6]         # 2nd
-        Ks[niqi:niqj, njqi:njqj] += keg[:6, 6:12]       # 1st
-        Ks[njqi:njqj, niqi:niqj] += keg[6:12, :6]       # 3rd
-        Ks[njqi:njqj, njqi:njqj] += keg[6:12, 6:12]     # 4th
+        megs[i] = element.mglobal()
+        kegs[i] = element.kglobal(model.settings.tref)     # room temp
 
         # modify diagonal elements, penalty method, by adding large
         # stiffnesses to the diagonals where a support is located
@@ -138,6 +139,11 @@ def modal(model, nmodes=3):
             Ms[niqi:niqj, niqi:niqj][di] += ksup[:6, 0]     # 2nd
             Ms[njqi:njqj, njqi:njqj][di] += ksup[6:12, 0]   # 4th
 
+    # assemble global mass and stiffness matrices
+    nzpat = pattern(edofs, nn*ndof)
+    assemble(Ms, edofs, megs, nzpat)
+    assemble(Ks, edofs, kegs, nzpat)
+
     tqdm.info("*** Reducing system mass and stiffness matrices.")
     # reduce assembled stiffness and mass matrices
     # Krows, Kcols = np.where(Ks == np.inf)
@@ -19,14 +19,17 @@
 
 import math
 import logging
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 
 import numpy as np
 from tqdm import trange
 
 from psi.loadcase import LoadCase, LoadComb
 from psi.loads import Hanger, Displacement
+from psi.elements import beam_klocal, Run, Rigid, Valve, Flange, Bellow
 from psi.solvers.codecheck import perform_code_check
+from psi.solvers.assembly import (point_index, connectivity, element_dofs,
+                                  assemble, rotate)
 from psi.supports import Inclined, AbstractSupport, Spring
 from psi import units
 
@@ -34,6 +37,17 @@ import sys
 from contextlib import redirect_stdout
 
 
+# batched local stiffness kernel of each element type, types not listed are
+# built one element at a time using klocal
+KLOCAL_KERNELS = {
+    Run: beam_klocal,
+    Rigid: beam_klocal,
+    Valve: beam_klocal,
+    Flange: beam_klocal,
+    Bellow: beam_klocal,
+}
+
+
 def order_of_mag(n):
     """Return the order of magnitude of a number n"""
     return math.floor(math.log10(n))
@@ -54,8 +68,11 @@ def static(model):
     tqdm.info("*** Solving primary loadcases...")
     # iterate each primary loadcase
     loadcases = [lc for lc in model.loadcases if isinstance(lc, LoadCase)]
+
+    # the element stiffness is the same for all primary loadcases
+    Ke = stiffness(model)
     for loadcase in loadcases:
-        solve(model, loadcase)
+        solve(model, loadcase, Ke)
 
     # switch back to user units - analysis is complete
     tqdm.info("*** Switching back to user units.")
@@ -72,7 +89,55 @@ def hanger_design(model):
     pass
 
 
-def solve(model, loadcase):
+def stiffness(model):
+    """Assemble the system stiffness matrix of the elements.
+
+    The element stiffness matrices are evaluated at the reference temperature
+    and do not depend on the loadcase, so the system matrix is assembled once
+    per analysis and copied for each primary loadcase.
+    """
+    ndof = 6    # nodal degrees of freedom
+    en = 2      # number of nodes per element
+    edof = en * ndof
+
+    points = list(model.points)
+    elements = list(model.elements)
+    nn = len(points)
+    ne = len(elements)
+
+    # element connectivity and corresponding system dofs
+    conn = connectivity(point_index(points), elements)
+    edofs = element_dofs(conn, ndof)
+
+    # element stiffness at room temp, conservative stresses
+    tref = model.settings.tref
+    kels = np.empty((ne, edof, edof), dtype=np.float64)
+    dcs = np.empty((ne, 3, 3), dtype=np.float64)
+
+    # elements are grouped by type so each type is built by its own kernel
+    groups = defaultdict(list)
+    for i, element in enumerate(elements):
+        groups[type(element)].append(i)
+        dcs[i] = element.dircos()
+
+    for etype, idx in groups.items():
+        kernel = KLOCAL_KERNELS.get(etype)
+        if kernel is None:
+            for i in idx:
+                kels[i] = elements[i].klocal(tref)
+        else:
+            props = np.array([elements[i].kprops(tref) for i in idx],
+                             dtype=np.float64)
+            kels[idx] = kernel(*props.T)
+
+    kegs = rotate(kels, dcs)
+
+    Ks = np.zeros((nn*ndof, nn*ndof), dtype=np.float64)
+
+    return assemble(Ks, edofs, kegs)
+
+
+def solve(model, loadcase, Ke=None):
     ndof = 6    # nodal degrees of freedom
     en = 2      # number of nodes per element
     edof = en * ndof
@@ -90,8 +155,10 @@ def solve(model, loadcase):
     tqdm = logging.getLogger("tqdm")
     tqdm.info("*** Solving loadcase %s" % loadcase.name)
 
-    # global system stiffness matrix
-    Ks = np.zeros((nn*ndof, nn*ndof), dtype=np.float64)
+    # global system stiffness matrix, modified by supports and loads
+    if Ke is None:
+        Ke = stiffness(model)
+    Ks = Ke.copy()
 
     # global system force matrix consisting of summation of loads
     Fs = np.zeros((nn*ndof, 1), dtype=np.float64)
@@ -101,28 +168,22 @@ def solve(model, loadcase):
     Fg = np.zeros((nn*ndof, 1), dtype=np.float64)   # member forces global
     Fm = np.zeros((ne*edof, 1), dtype=np.float64)   # member forces local
 
+    # element connectivity
+    nodes = point_index(points)
+    conn = connectivity(nodes, elements)
+
     # do stuff here
     tqdm.info("    --> Assembling system stiffness and force matrices.")
 
     # pre-processing elements
-    for element in model.elements:
-        idxi = points.index(element.from_point)
-        idxj = points.index(element.to_point)
+    for i, element in enumerate(elements):
+        idxi, idxj = conn[i]
 
         # node and corresponding dof (start, finish), used to define the
         # elements of the system stiffness and force matrices
         niqi, niqj = idxi*ndof, idxi*ndof + ndof
         njqi, njqj = idxj*ndof, idxj*ndof + ndof
 
-        # element stiffness at room temp, conservative stresses
-        keg = element.kglobal(model.settings.tref)
-
-        # assemble global stiffness matrix, quadrant 1 to 4
-        Ks[niqi:niqj, niqi:niqj] += keg[:6, :6]         # 2nd
-        Ks[niqi:niqj, njqi:njqj] += keg[:6, 6:12]       # 1st
-        Ks[njqi:njqj, niqi:niqj] += keg[6:12, :6]       # 3rd
-        Ks[njqi:njqj, njqi:njqj] += keg[6:12, 6:12]     # 4th
-
         # stiffness matrix modified at nodes with supports
         # supports with displacments also modify global force vector
         for support in element.supports:
@@ -220,8 +281,8 @@ def solve(model, loadcase):
             for i, support in enumerate(nonlinear.keys()):
                 element = support.element
 
-                idxi = points.index(element.from_point)
-                idxj = points.index(element.to_point)
+                idxi = nodes[element.from_point]
+                idxj = nodes[element.to_point]
 
                 # node and corresponding dof (start, finish), used to
                 # define the elements of the system stiffness and force
@@ -362,9 +423,8 @@ def solve(model, loadcase):
     tqdm.info("    --> Post processing elements...")
     tqdm.info("    --> Calculating support reactions and internal forces""")
     Rs[:, 0] = 0     # reset reaction vector
-    for element in model.elements:
-        idxi = points.index(element.from_point)
-        idxj = points.index(element.to_point)
+    for i, element in enumerate(elements):
+        idxi, idxj = conn[i]
 
         # node and corresponding dof (start, finish)
         niqi, niqj = idxi*ndof, idxi*ndof + ndof
@@ -428,8 +488,7 @@ def solve(model, loadcase):
         Fg[njqi:njqj, 0] = fig[6:12, 0]
 
         # member forces - local
-        idxi = elements.index(element)
-        eiqi, eiqj = idxi*edof, idxi*edof + edof
+        eiqi, eiqj = i*edof, i*edof + edof
         Fm[eiqi:eiqj, 0] = fim[:, 0]
 
     tqdm.info("    --> Writing loadcase results data.")
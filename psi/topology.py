@@ -29,6 +29,7 @@ class Vertex(object):
         self.y = y
         self.z = z
         self.edges = []
+        self.nedges = 0     # len(edges), kept by ME and KE
         self.data = {}
 
     @property
@@ -164,7 +165,7 @@ class Geometry(object):
 
     def _get_id(self, entity, entities):
         """Get the id of an entity"""
-        for id, obj in entities.iteritems():
+        for id, obj in entities.items():
             if obj is entity:
                 return id
 
@@ -197,12 +198,16 @@ class Geometry(object):
         self.edges[id] = edge
         v1.edges.append(edge)   # add to disk cycle
         v2.edges.append(edge)
+        v1.nedges += 1
+        v2.nedges += 1
         return edge
 
     def KE(self, e):
         """Kill-Edge"""
         e.v1.edges.remove(e)
         e.v2.edges.remove(e)
+        e.v1.nedges -= 1
+        e.v2.nedges -= 1
         e.v1 = e.v2 = None
         e.data.clear()
         e.data = None
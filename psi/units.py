@@ -114,6 +114,7 @@ class Units(object):
     """Allows for units to be defined for managed attributes"""
 
     _app = None
+    _units_cache = {}   # units files by name
 
     def __init__(self, base_units="base", user_units="english"):
         self.set_base_units(base_units)
@@ -154,9 +155,19 @@ class Units(object):
         return self._app
 
     def load_units_file(self, name):
-        with open(os.path.join(UNITS_DIRECTORY, name + ".csv")) as csvfile:
-            reader = csv.DictReader(csvfile)
-            units = next(reader)
+        """Read a units file once and cache the result.
+
+        A units context manager is entered for most code calculations, so the
+        file would otherwise be read and parsed each time.
+        """
+        units = Units._units_cache.get(name, None)
+
+        if units is None:
+            with open(os.path.join(UNITS_DIRECTORY, name + ".csv")) as csvfile:
+                reader = csv.DictReader(csvfile)
+                units = next(reader)
+
+            Units._units_cache[name] = units
 
         return units
 
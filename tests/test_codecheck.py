@@ -0,0 +1,302 @@
+"""Code check tests"""
+
+from functools import reduce
+from itertools import zip_longest
+import math
+
+import numpy as np
+import pytest
+
+from psi.app import App
+from psi.model import Model
+from psi.point import Point
+from psi.elements import Run
+from psi.sections import Pipe
+from psi.material import Material
+from psi.codes.b311 import B31167
+from psi.sifs import Welding
+from psi.supports import Anchor, Y
+from psi.loads import Weight, Pressure, Thermal
+from psi.loadcase import LoadCase, LoadComb, CombMethod
+from psi.solvers.assembly import point_index, connectivity
+from psi.solvers.codecheck import combine, node_stresses, element_codecheck
+from psi import units
+
+
+# the combination of the stresses of each loadcase one value at a time
+SCALAR_COMBINE = {
+    CombMethod.SCALAR: sum,
+    CombMethod.SRSS: lambda values: math.sqrt(sum(v*v for v in values)),
+    CombMethod.ABS: lambda values: sum(abs(v) for v in values),
+    CombMethod.SIGNMAX: max,
+    CombMethod.SIGNMIN: min,
+    CombMethod.MAX: lambda values: reduce(LoadComb._maxfunc, values),
+    CombMethod.MIN: lambda values: reduce(LoadComb._minfunc, values),
+}
+
+
+@pytest.mark.parametrize("method", list(CombMethod))
+def test_combine(method):
+    """Each combination method against a scalar combination"""
+    rng = np.random.RandomState(0)
+
+    # loadcases, stress terms, nodes with repeated values for ties
+    stack = rng.randint(-3, 4, (3, 7, 10)).astype(np.float64)
+
+    if method == CombMethod.ALGEBRAIC:
+        # derived from the combined forces instead
+        with pytest.raises(ValueError):
+            combine(method, stack)
+        return
+
+    values = combine(method, stack)
+
+    func = SCALAR_COMBINE[method]
+    expected = np.empty(stack.shape[1:])
+    for i, j in np.ndindex(*expected.shape):
+        expected[i, j] = func(list(stack[:, i, j]))
+
+    np.testing.assert_allclose(values, expected)
+
+
+def test_combine_scaler_alias():
+    stack = np.arange(12, dtype=np.float64).reshape(2, 3, 2)
+
+    np.testing.assert_array_equal(combine(CombMethod.SCALER, stack),
+                                  combine(CombMethod.SCALAR, stack))
+
+
+def baseline_node_stresses(nn, conn, Si, Sj):
+    """The node stresses of the element by element code check"""
+    S = np.zeros((nn, 15), dtype=np.float64)
+
+    for (idxi, idxj), si, sj in zip(conn, Si, Sj):
+        if si[9] > S[idxi, 9]:
+            S[idxi, :15] = si
+
+        if sj[9] > S[idxj, 9]:
+            S[idxj, :15] = sj
+
+    return S
+
+
+def test_node_stresses_ties():
+    """The first element wins when the code ratios are the same"""
+    # three elements meeting at node 1, i.e. a tee
+    conn = np.array([[0, 1], [1, 2], [1, 3]])
+    Si = np.zeros((3, 15))
+    Sj = np.zeros((3, 15))
+
+    # the first column identifies the element node
+    Si[:, 0] = [1, 2, 3]
+    Sj[:, 0] = [-1, -2, -3]
+
+    Si[:, 9] = [0.5, 0.5, 0.5]
+    Sj[:, 9] = [0.5, 0.5, 0.5]
+
+    S = node_stresses(4, conn, Si, Sj)
+
+    # node j of element 0 comes before node i of elements 1 and 2
+    assert S[1, 0] == -1
+    assert S[0, 0] == 1
+    assert S[2, 0] == -2
+    assert S[3, 0] == -3
+
+    np.testing.assert_array_equal(S, baseline_node_stresses(4, conn, Si, Sj))
+
+
+def test_node_stresses_no_ratio():
+    """Nodes without a positive code ratio are zero"""
+    conn = np.array([[0, 1], [1, 2]])
+    Si = np.ones((2, 15))
+    Sj = np.ones((2, 15))
+
+    Si[:, 9] = [0, np.nan]
+    Sj[:, 9] = [-1, 0]
+
+    S = node_stresses(3, conn, Si, Sj)
+
+    np.testing.assert_array_equal(S, np.zeros((3, 15)))
+
+
+def test_node_stresses_random():
+    """The node stresses against the element by element code check"""
+    rng = np.random.RandomState(0)
+
+    for _ in range(100):
+        nn = rng.randint(1, 8)
+        ne = rng.randint(0, 12)
+        conn = rng.randint(0, nn, (ne, 2))
+
+        # few distinct ratios for ties
+        Si = rng.randint(-2, 3, (ne, 15)).astype(np.float64)
+        Sj = rng.randint(-2, 3, (ne, 15)).astype(np.float64)
+        Si[:, 0] = np.arange(ne)
+        Sj[:, 0] = -np.arange(ne)
+
+        np.testing.assert_array_equal(node_stresses(nn, conn, Si, Sj),
+                                      baseline_node_stresses(nn, conn, Si,
+                                                             Sj))
+
+
+@pytest.fixture()
+def app():
+    """A tee with pressure and thermal loads and a loadcomb per method"""
+    app = App()
+
+    mdl = Model('codecheck')
+    mdl.settings.vertical = "z"
+
+    Pipe.from_file('pipe1', '10', '40')
+    Material.from_file('mat1', 'A53A', 'B31.1')
+    B31167('code1')
+
+    Point(10)
+    run20 = Run(20, 60)
+    Run(30, 60)
+    Run(40, 0, 60)
+    Run(50, 0, 0, 60)
+    app.points(30).activate()
+    Run(60, 60)
+
+    Anchor('a10', 10).apply([run20])
+    Anchor('a50', 50).apply([app.elements(40, 50)])
+    Y('y60', 60).apply([app.elements(30, 60)])
+    Welding('t30', 30, 10.75, 0.365, 10.75, 0, 0).apply(
+        [app.elements(20, 30), app.elements(30, 40)])
+
+    app.elements.select()
+    Weight('W1', 1).apply()
+    Pressure('P1', 1, 250).apply()
+    Thermal('T1', 1, 500, 70).apply()
+
+    L1 = LoadCase('L1', 'sus', [Weight, Pressure], [1, 1])
+    L2 = LoadCase('L2', 'ope', [Weight, Pressure, Thermal], [1, 1, 1])
+    L3 = LoadCase('L3', 'occ', [Weight, Pressure], [1, 1])
+
+    stypes = {CombMethod.ALGEBRAIC: 'exp', CombMethod.SCALAR: 'sus',
+              CombMethod.SRSS: 'occ', CombMethod.ABS: 'exp',
+              CombMethod.SIGNMAX: 'sus', CombMethod.SIGNMIN: 'occ',
+              CombMethod.MAX: 'sus', CombMethod.MIN: 'occ'}
+    for method in CombMethod:
+        LoadComb('C%s' % method.name, stypes[method], method.name.lower(),
+                 [L2, L1], [1, -1])
+
+    # missing factors default to 1
+    LoadComb('CPAD', 'sus', 'abs', [L1, L3], [1.5])
+
+    # operating stresses have no allowable
+    LoadComb('COPE', 'ope', 'scalar', [L1, L3])
+
+    mdl.analyze()
+
+    return app
+
+
+def scalar_codecheck(code, element, loadcase):
+    """The shoop, slp, sl, sallow and sratio at node i and j of the element
+    calculated one value at a time.
+    """
+    points = element.from_point, element.to_point
+
+    def node_forces(case):
+        return [np.array(case.forces[point]) for point in points]
+
+    if isinstance(loadcase, LoadCase):
+        forces = node_forces(loadcase)
+        shoop = code.shoop(element, loadcase)
+        slp = code.slp(element, loadcase)
+        sl = [code.sl(element, loadcase, point, force)
+              for point, force in zip(points, forces)]
+    else:
+        loadcomb = loadcase
+        terms = []
+        for factor, loadcase in zip_longest(loadcomb.factors,
+                                            loadcomb.loadcases, fillvalue=1):
+            forces = node_forces(loadcase)
+            terms.append([factor*code.shoop(element, loadcase),
+                          factor*code.slp(element, loadcase)] +
+                         [code.sl(element, loadcase, point, force)
+                          for point, force in zip(points, forces)])
+
+        method = loadcomb.method_id
+        if method == CombMethod.ALGEBRAIC:
+            shoop = sum(term[0] for term in terms)
+            slp = sum(term[1] for term in terms)
+
+            # the last loadcase is used for the stress type
+            forces = node_forces(loadcomb)
+            sl = [code.sl(element, loadcase, point, force)
+                  for point, force in zip(points, forces)]
+        else:
+            func = SCALAR_COMBINE[method]
+            shoop, slp, sli, slj = [func(values) for values in zip(*terms)]
+            sl = [sli, slj]
+
+        loadcase = loadcomb
+
+    sallow = [code.sallow(element, loadcase, point, force,
+                          stype=loadcase.stype)
+              for point, force in zip(points, forces)]
+    sratio = [sl_ / sallow_ if sallow_ != 0 else 0
+              for sl_, sallow_ in zip(sl, sallow)]
+
+    return [(shoop, slp, sl[k], sallow[k], sratio[k]) for k in range(2)]
+
+
+def test_element_codecheck(app):
+    """The batched code check against the scalar code check for each stress
+    type and combination method.
+    """
+    model = app.models('codecheck')
+    code = app.codes('code1')
+    elements = list(model.elements)
+    conn = connectivity(point_index(list(model.points)), elements)
+
+    # shoop, slp, sl, sallow, sratio
+    cols = [0, 3, 5, 8, 9]
+
+    checked = set()
+    for loadcase in model.loadcases:
+        Si, Sj = element_codecheck(code, elements, loadcase, conn)
+
+        with units.Units(user_units="code_english"):
+            expected = [scalar_codecheck(code, element, loadcase)
+                        for element in elements]
+
+        np.testing.assert_allclose(Si[:, cols], [row[0] for row in expected],
+                                   rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(Sj[:, cols], [row[1] for row in expected],
+                                   rtol=1e-9, atol=1e-9)
+
+        assert np.isfinite(Si).all() and np.isfinite(Sj).all()
+        checked.add(loadcase.stype)
+
+    assert checked == {'sus', 'ope', 'occ', 'exp'}
+
+
+def test_cached(app):
+    """The memoized values are discarded after the code check"""
+    code = app.codes('code1')
+    assert "_cache" not in code.__dict__
+
+    with code.cached():
+        assert code._cache == {}
+
+    assert "_cache" not in code.__dict__
+    assert code._cache is None
+
+
+def test_sratio_no_allowable(app):
+    """The code ratio is zero where there is no allowable stress"""
+    model = app.models('codecheck')
+    code = app.codes('code1')
+    elements = list(model.elements)
+    conn = connectivity(point_index(list(model.points)), elements)
+
+    Si, Sj = element_codecheck(code, elements, app.loadcases('COPE'), conn)
+
+    for S in (Si, Sj):
+        assert (S[:, 8] == 0).all()
+        assert (S[:, 5] != 0).any()
+        assert (S[:, 9] == 0).all()
@@ -0,0 +1,165 @@
+"""Entity and entity container tests"""
+
+import pytest
+
+from psi.app import App
+from psi.model import Model
+from psi.point import Point
+from psi.elements import Run
+from psi.sections import Pipe
+
+
+@pytest.fixture()
+def app():
+    app = App()
+    Model('mdl1')
+
+    Point(10)
+    Pipe.from_file('PIPE1', '10', '40')
+
+    return app
+
+
+def test_rename(app):
+    pipe = app.sections('PIPE1')
+    pipe.name = 'PIPE2'
+
+    assert pipe.name == 'PIPE2'
+    assert app.sections('PIPE2') is pipe
+    assert 'PIPE1' not in app.sections.objects
+    assert app.sections.name(pipe) == 'PIPE2'
+
+
+def test_rename_taken(app):
+    Pipe.from_file('PIPE2', '8', '40')
+    pipe = app.sections('PIPE1')
+
+    with pytest.raises(AssertionError):
+        pipe.name = 'PIPE2'
+
+    assert app.sections('PIPE1') is pipe
+
+
+def test_contains_after_rename(app):
+    pipe = app.sections('PIPE1')
+    pipe.name = 'PIPE2'
+
+    assert pipe in app.sections
+
+    # a new object reusing the old name is a different object
+    other = Pipe.from_file('PIPE1', '8', '40')
+    assert other in app.sections
+    assert app.sections('PIPE1') is other
+    assert app.sections('PIPE2') is pipe
+
+
+def test_rename_then_delete(app):
+    pipe = app.sections('PIPE1')
+    pipe.name = 'PIPE2'
+    pipe.delete()
+
+    assert pipe not in app.sections
+    assert len(app.sections) == 0
+    assert app.sections.name(pipe) is None
+
+    # deleting again does nothing
+    assert app.sections.delete(pipe) is None
+
+
+def test_activate_model(app):
+    mdl1 = app.models('mdl1')
+    pt1 = app.points(10)
+
+    Model('mdl2')
+    pt2 = Point(10)
+
+    assert pt2 in app.points
+    assert pt1 not in app.points
+
+    mdl1.activate()
+    assert pt1 in app.points
+    assert pt2 not in app.points
+    assert app.points(10) is pt1
+
+    # the reverse lookup follows the active model
+    pipe = app.sections('PIPE1')
+    pipe.name = 'PIPE2'
+    assert app.sections('PIPE2') is pipe
+
+    app.models('mdl2').activate()
+    assert pipe not in app.sections
+    assert len(app.sections) == 0
+
+
+def test_delete_active(app):
+    pipe = app.sections('PIPE1')
+    assert app.sections.active_object is pipe
+
+    pipe.delete()
+    assert app.sections.active_object is None
+    assert pipe not in app.sections
+
+
+def test_close_active_model(app):
+    mdl1 = app.models('mdl1')
+    mdl1.close()
+
+    assert app.models.active_object is None
+    assert app.points.active_object is None
+    assert app.sections.active_object is None
+    assert len(app.points) == 0
+
+    # objects can not be created without an active model
+    with pytest.raises(AssertionError):
+        Point(20)
+
+
+def test_app_instance(app):
+    assert App.instance() is app
+
+    # a new application becomes the running application
+    app2 = App()
+    assert app2 is not app
+    assert App.instance() is app2
+
+    Model('mdl2')
+    pt = Point(10)
+    assert pt.app.points(10) is pt
+    assert app2.models.active_object is pt.app.models.active_object
+
+
+def test_reactivate_model(app):
+    mdl1 = app.models('mdl1')
+    Run(20, 10)
+
+    Model('mdl2')
+    mdl1.activate()
+    Run(30, 10)
+
+    # activating the active model keeps its active objects
+    mdl1.activate()
+    assert app.points.active_object is app.points(30)
+
+    Run(40, 10)
+    assert app.elements(30, 40) in app.elements
+
+
+def test_rename_switch_models(app):
+    """Each model keeps its own reverse name lookup"""
+    mdl1 = app.models('mdl1')
+    pipe = app.sections('PIPE1')
+    pipe.name = 'PIPE2'
+
+    Model('mdl2')
+    other = Pipe.from_file('PIPE2', '8', '40')
+
+    mdl1.activate()
+    assert pipe in app.sections
+    assert other not in app.sections
+    assert app.sections.name(pipe) == 'PIPE2'
+
+    pipe.delete()
+    assert len(app.sections) == 0
+
+    app.models('mdl2').activate()
+    assert app.sections.name(other) == 'PIPE2'
@@ -0,0 +1,108 @@
+"""Model save and open tests"""
+
+import os
+
+import pytest
+
+from psi.app import App
+from psi.model import Model
+from psi.point import Point
+from psi.elements import Run
+from psi.sections import Pipe
+from psi.material import Material
+from psi.codes.b311 import B31167
+from psi.sifs import Welding
+from psi.supports import Anchor
+from psi.loads import Weight
+from psi.loadcase import LoadCase
+from .utils import compare
+
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture()
+def app():
+    app = App()
+
+    mdl = Model('mdl')
+    mdl.settings.vertical = "z"
+
+    Pipe.from_file('pipe1', '10', '40')
+    Material.from_file('mat1', 'A53A', 'B31.1')
+    B31167('code1')
+
+    Point(10)
+    run20 = Run(20, 0, 0, 120)
+    Run(30, 0, 120)
+
+    Anchor('a10', 10).apply([run20])
+    Welding('t20', 20, 10.75, 0.365, 10.75, 0, 0).apply([run20])
+
+    app.elements.select()
+    Weight('W1', 1).apply()
+    LoadCase('L1', 'sus', [Weight], [1])
+
+    mdl.analyze()
+
+    return app
+
+
+def check_model(app, mdl):
+    """Check the model objects and results after it is opened"""
+    pt30 = app.points(30)
+    run20 = app.elements(10, 20)
+    L1 = app.loadcases('L1')
+
+    assert app.models.active_object is mdl
+    assert [pt.name for pt in mdl.points] == [10, 20, 30]
+    assert pt30 in app.points
+    assert run20 in app.elements
+    assert app.sections('pipe1') in app.sections
+
+    # hashed containers still find their objects
+    assert app.loads('W1') in run20.loads
+    assert app.sifs('t20') in run20.sifs
+    assert app.sifs('t20').element is run20
+
+    dz = 2
+    assert compare(L1.movements[pt30][dz], -0.09799)
+
+    mdl.analyze()
+    assert compare(L1.movements[pt30][dz], -0.09799)
+
+
+def test_save_open(app, tmp_path):
+    fname = str(tmp_path / "mdl.psi")
+
+    mdl = app.models('mdl')
+    mdl.save_as(fname)
+    mdl.close()
+
+    mdl = app.models.open(fname)
+    assert mdl.name == 'mdl'
+    check_model(app, mdl)
+
+
+def test_open_baseline():
+    """Open a file saved before the entity slots and internal container
+    changes.
+    """
+    app = App()
+
+    mdl = app.models.open(os.path.join(DATA, "baseline.psi"))
+    assert mdl.name == 'baseline'
+    check_model(app, mdl)
+
+
+def test_open_baseline_save(tmp_path):
+    """An upgraded file is saved in the current format"""
+    app = App()
+    fname = str(tmp_path / "mdl.psi")
+
+    mdl = app.models.open(os.path.join(DATA, "baseline.psi"))
+    mdl.save_as(fname)
+    mdl.close()
+
+    mdl = app.models.open(fname)
+    check_model(app, mdl)
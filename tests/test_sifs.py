@@ -136,3 +136,18 @@ def test_sweepolet(app):
     sifi20 = code.sifi(run20, pt20)
 
     assert compare(sifi20, 1.6366)
+
+
+def test_buttweld(app):
+    """Check buttweld sif."""
+    pt30 = app.points(30)
+    run30 = app.elements(20, 30)
+
+    # define buttweld
+    bw30 = ButtWeld('bw30', 30)
+    bw30.apply([run30])
+
+    code = app.codes('code1')
+    sifi30 = code.sifi(run30, pt30)
+
+    assert compare(sifi30, 1.0)